@@ -4,22 +4,30 @@ Scheduler for periodic alarm synchronization
 import logging
 import time
 import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from typing import Optional
 from alarm_sync_service import AlarmSyncService
+from database import DatabaseManager
+from sync_executor import EXECUTOR
 
 logger = logging.getLogger(__name__)
 
 class AlarmSyncScheduler:
     """Scheduler for periodic alarm synchronization every 5 minutes"""
-    
-    def __init__(self, update_interval_minutes: int = 5):
-        self.alarm_sync_service = AlarmSyncService()
+
+    __slots__ = (
+        'alarm_sync_service', 'update_interval_minutes', '_running',
+        '_scheduler_future', '_stop_event', '_next_deadline'
+    )
+
+    def __init__(self, update_interval_minutes: int = 5, alarm_sync_service: Optional[AlarmSyncService] = None):
+        self.alarm_sync_service = alarm_sync_service or AlarmSyncService()
         self.update_interval_minutes = update_interval_minutes
         self._running = False
-        self._scheduler_thread: Optional[threading.Thread] = None
+        self._scheduler_future: Optional[Future] = None
         self._stop_event = threading.Event()
-        self._next_run_time: Optional[datetime] = None
+        self._next_deadline: float = 0.0
     
     def start(self) -> bool:
         """Start the alarm scheduler"""
@@ -31,15 +39,9 @@ class AlarmSyncScheduler:
         
         self._running = True
         self._stop_event.clear()
-        self._scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
-        self._scheduler_thread.start()
-        
-        # Perform initial sync
-        logger.info("Performing initial alarm sync...")
-        initial_sync_success = self.alarm_sync_service.sync_alarms()
-        if not initial_sync_success:
-            logger.warning("Initial alarm sync failed, but scheduler will continue running")
-        
+        # The loop runs on the shared sync pool rather than a dedicated thread
+        self._scheduler_future = EXECUTOR.submit(self._scheduler_loop)
+
         return True
     
     def stop(self) -> bool:
@@ -52,11 +54,11 @@ class AlarmSyncScheduler:
         self._running = False
         self._stop_event.set()
         
-        if self._scheduler_thread and self._scheduler_thread.is_alive():
-            self._scheduler_thread.join(timeout=10)  # Wait up to 10 seconds
-            
-            if self._scheduler_thread.is_alive():
-                logger.warning("Alarm scheduler thread did not stop gracefully")
+        if self._scheduler_future is not None:
+            try:
+                self._scheduler_future.result(timeout=10)  # Wait up to 10 seconds
+            except FutureTimeoutError:
+                logger.warning("Alarm scheduler loop did not stop gracefully")
                 return False
         
         logger.info("Alarm sync scheduler stopped")
@@ -64,19 +66,34 @@ class AlarmSyncScheduler:
     
     def _scheduler_loop(self):
         """Main alarm scheduler loop"""
+        # Perform the initial sync on the scheduler thread so start() does not
+        # block on network I/O
+        logger.info("Performing initial alarm sync...")
+        initial_sync_success = self.alarm_sync_service.sync_alarms()
+        if not initial_sync_success:
+            logger.warning("Initial alarm sync failed, but scheduler will continue running")
+
+        interval_seconds = self.update_interval_minutes * 60
+        self._next_deadline = time.monotonic() + interval_seconds
+
         while self._running and not self._stop_event.is_set():
             try:
-                # Calculate next run time
-                self._next_run_time = datetime.now() + timedelta(minutes=self.update_interval_minutes)
-                
-                # Wait for the interval or stop event
-                if self._stop_event.wait(timeout=self.update_interval_minutes * 60):
-                    # Stop event was set
-                    break
-                
+                # Wait until the absolute deadline so sync duration doesn't
+                # drift the cadence
+                wait_seconds = self._next_deadline - time.monotonic()
+
+                if wait_seconds > 0:
+                    if self._stop_event.wait(timeout=wait_seconds):
+                        # Stop event was set
+                        break
+                    # Re-check the deadline: a force_sync may have pushed it back
+                    continue
+
                 if not self._running:
                     break
-                
+
+                self._next_deadline += interval_seconds
+
                 # Perform alarm sync
                 logger.info("Scheduled alarm sync starting...")
                 success = self.alarm_sync_service.sync_alarms()
@@ -94,17 +111,53 @@ class AlarmSyncScheduler:
     def get_status(self) -> dict:
         """Get alarm scheduler status"""
         alarm_sync_status = self.alarm_sync_service.get_sync_status()
-        
+
+        # Only convert the monotonic deadline to wall-clock time when asked
+        next_run_time = None
+        if self._running and self._next_deadline:
+            wait_seconds = max(0, self._next_deadline - time.monotonic())
+            next_run_time = (datetime.now() + timedelta(seconds=wait_seconds)).isoformat()
+
         return {
             'scheduler_running': self._running,
             'update_interval_minutes': self.update_interval_minutes,
-            'next_run_time': self._next_run_time.isoformat() if self._next_run_time else None,
+            'next_run_time': next_run_time,
             'alarm_sync_status': alarm_sync_status
         }
     
+    @classmethod
+    def read_status_only(cls, update_interval_minutes: int = 5) -> dict:
+        """Status snapshot for the CLI without scheduler machinery
+
+        Builds only a DatabaseManager — no sync service, no API client —
+        so the status command reads counts and timestamps and exits. The
+        dict matches get_status()'s shape with the runtime-only fields at
+        their idle values; lookback_minutes mirrors the AlarmSyncService
+        default.
+        """
+        stats = DatabaseManager().get_stats()
+        return {
+            'scheduler_running': False,
+            'update_interval_minutes': update_interval_minutes,
+            'next_run_time': None,
+            'alarm_sync_status': {
+                'last_sync_time': None,
+                'sync_in_progress': False,
+                'total_devices_monitored': stats['device_count'],
+                'total_alarms': stats['alarm_count'],
+                'last_alarm_update': stats['last_alarm_update'],
+                'lookback_minutes': 10
+            }
+        }
+
     def force_sync(self) -> bool:
         """Force an immediate alarm sync"""
-        return self.alarm_sync_service.force_sync()
+        result = self.alarm_sync_service.force_sync()
+        # Restart the interval from now so the next scheduled sync doesn't
+        # immediately duplicate the forced one
+        if self._running:
+            self._next_deadline = time.monotonic() + self.update_interval_minutes * 60
+        return result
     
     def is_running(self) -> bool:
         """Check if alarm scheduler is running"""
@@ -3,47 +3,195 @@ Alarm synchronization service
 Handles periodic fetching and updating of alarm data from all devices
 """
 import logging
+import queue
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import Optional, List
-from threading import Lock
+from threading import Lock, Thread
 from api_client import BrigadeAPIClient
 from database import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
+# Sentinel pushed onto the alarm queue to tell the DB writer a sync is done
+_QUEUE_SENTINEL = object()
+
+class TokenBucket:
+    """Thread-safe token bucket used to pace outgoing API requests"""
+
+    __slots__ = ('rate', 'burst', '_tokens', '_last_refill', '_lock')
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate  # Tokens added per second
+        self.burst = burst  # Maximum tokens the bucket can hold
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._lock = Lock()
+
+    def acquire(self, tokens: int = 1):
+        """Block until the requested number of tokens is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+                self._last_refill = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait_time = (tokens - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+class DeviceAlarmCoalescer:
+    """Collapses concurrent per-device alarm fetches into one batched call
+
+    Per-device requests are buffered for up to max_wait_ms (or until
+    max_batch devices are pending) and then fired as a single multi-terid
+    get_alarm_details call, with each caller's future resolved from its
+    slice of the shared response.
+    """
+
+    __slots__ = ('api_client', 'max_wait_ms', 'max_batch', '_lock',
+                 '_pending', '_flush_scheduled')
+
+    def __init__(self, api_client: BrigadeAPIClient, max_wait_ms: int = 200,
+                 max_batch: int = 50):
+        self.api_client = api_client
+        self.max_wait_ms = max_wait_ms
+        self.max_batch = max_batch
+        self._lock = Lock()
+        # terid -> (Future, start_time_str, end_time_str)
+        self._pending: dict = {}
+        # True while a delayed flush is scheduled for the current _pending
+        # dict. Tracked as a flag rather than by flush-thread liveness: the
+        # thread stays alive through the API call itself, during which new
+        # submissions would otherwise be stranded with no flush coming
+        self._flush_scheduled = False
+
+    def submit(self, terid: str, start_time_str: str, end_time_str: str) -> Future:
+        """Queue a per-device fetch and return a future for its alarms"""
+        with self._lock:
+            existing = self._pending.get(terid)
+            if existing is not None:
+                # A fetch for this device is already queued; share its result
+                return existing[0]
+
+            future: Future = Future()
+            self._pending[terid] = (future, start_time_str, end_time_str)
+
+            if len(self._pending) >= self.max_batch:
+                pending, self._pending = self._pending, {}
+                Thread(target=self._flush, args=(pending,), daemon=True).start()
+            elif not self._flush_scheduled:
+                self._flush_scheduled = True
+                Thread(target=self._delayed_flush, daemon=True).start()
+
+            return future
+
+    def _delayed_flush(self):
+        """Wait out the coalescing window, then flush whatever is pending"""
+        time.sleep(self.max_wait_ms / 1000.0)
+        # Swap the dict and clear the flag under one lock hold, so a submit
+        # arriving after this point sees an empty dict with no flush
+        # scheduled and starts a fresh window
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flush_scheduled = False
+        if pending:
+            self._flush(pending)
+
+    def _flush(self, pending: dict):
+        """Fire one batched API call and resolve the per-device futures"""
+        # Use the widest requested window so every caller's range is covered
+        start_time_str = min(entry[1] for entry in pending.values())
+        end_time_str = max(entry[2] for entry in pending.values())
+
+        try:
+            alarms = self.api_client.get_alarm_details(
+                terid_list=list(pending.keys()),
+                start_time=start_time_str,
+                end_time=end_time_str
+            )
+        except Exception as e:
+            for future, _, _ in pending.values():
+                future.set_exception(e)
+            return
+
+        if alarms is None:
+            for future, _, _ in pending.values():
+                future.set_result(None)
+            return
+
+        by_terid: dict = {terid: [] for terid in pending}
+        for alarm in alarms:
+            terid = alarm.get('terid')
+            if terid in by_terid:
+                by_terid[terid].append(alarm)
+
+        for terid, (future, _, _) in pending.items():
+            future.set_result(by_terid[terid])
+
 class AlarmSyncService:
     """Service to synchronize alarm data from API to database"""
-    
-    def __init__(self):
-        self.api_client = BrigadeAPIClient()
-        self.db_manager = DatabaseManager()
+
+    __slots__ = (
+        'api_client', 'db_manager', '_sync_lock', '_last_sync_time',
+        '_last_cleanup_time', 'lookback_minutes',
+        'batch_size', 'max_workers', 'requests_per_second', '_rate_limiter',
+        'terids_cache_ttl', '_terids_cache', '_terids_cache_time',
+        '_alarm_queue', '_device_coalescer'
+    )
+
+    def __init__(self, api_client: Optional[BrigadeAPIClient] = None,
+                 db_manager: Optional[DatabaseManager] = None):
+        # Accept shared instances so services can reuse one API session and
+        # one database manager instead of each building their own
+        self.api_client = api_client or BrigadeAPIClient()
+        self.db_manager = db_manager or DatabaseManager()
         self._sync_lock = Lock()
         self._last_sync_time: Optional[datetime] = None
-        self._sync_in_progress = False
+        self._last_cleanup_time = 0.0
         
         # Configuration for alarm fetching
         self.lookback_minutes = 10  # How far back to look for alarms
         self.batch_size = 50  # Max devices to process per API call
+        self.max_workers = 8  # Concurrent batch fetches
+        self.requests_per_second = 8.0  # API request budget
+        self._rate_limiter = TokenBucket(rate=self.requests_per_second, burst=self.max_workers)
+
+        # Device terids change rarely, so cache them instead of re-scanning
+        # the device table on every sync
+        self.terids_cache_ttl = 300  # Seconds
+        self._terids_cache: List[str] = []
+        self._terids_cache_time = 0.0
+
+        # Bounded queue between the API fetchers and the DB writer thread so
+        # database inserts overlap with in-flight batch fetches
+        self._alarm_queue: queue.Queue = queue.Queue(maxsize=1000)
+
+        # Concurrent per-device sync requests (e.g. from the UI) collapse
+        # into one multi-terid API call instead of N single-device calls
+        self._device_coalescer = DeviceAlarmCoalescer(self.api_client)
     
     def sync_alarms(self) -> bool:
         """
         Synchronize alarms from all devices in the database
         Returns True if successful, False otherwise
         """
-        if self._sync_in_progress:
+        # Try-lock instead of a separate flag plus blocking acquire: the flag
+        # check and lock acquisition were racy, and a blocked caller would
+        # pointlessly re-run the sync as soon as the current one finished
+        if not self._sync_lock.acquire(blocking=False):
             logger.warning("Alarm sync already in progress, skipping...")
             return False
-        
-        with self._sync_lock:
-            self._sync_in_progress = True
-            
+
+        try:
             try:
                 logger.info("Starting alarm synchronization...")
                 start_time = time.time()
                 
-                # Get all device terminal IDs from database
-                device_terids = self.db_manager.get_all_device_terids()
+                # Get all device terminal IDs (cached between syncs)
+                device_terids = self._get_device_terids()
                 if not device_terids:
                     logger.warning("No devices found in database for alarm monitoring")
                     return True
@@ -57,42 +205,54 @@ class AlarmSyncService:
                 start_time_str = start_time_query.strftime("%Y-%m-%d %H:%M:%S")
                 end_time_str = end_time.strftime("%Y-%m-%d %H:%M:%S")
                 
-                total_alarms = 0
-                total_inserted = 0
                 total_failed = 0
-                
-                # Process devices in batches to avoid overwhelming the API
-                for i in range(0, len(device_terids), self.batch_size):
-                    batch_terids = device_terids[i:i + self.batch_size]
-                    
-                    logger.debug(f"Processing alarm batch {i//self.batch_size + 1}: {len(batch_terids)} devices")
-                    
-                    # Fetch alarms for this batch
-                    alarms = self.api_client.get_alarm_details(
-                        terid_list=batch_terids,
-                        start_time=start_time_str,
-                        end_time=end_time_str
-                    )
-                    
-                    if alarms is None:
-                        logger.error(f"Failed to fetch alarms for batch {i//self.batch_size + 1}")
-                        total_failed += len(batch_terids)
-                        continue
-                    
-                    if alarms:
-                        # Insert alarms into database
-                        results = self.db_manager.insert_alarms_batch(alarms)
-                        total_alarms += len(alarms)
-                        total_inserted += results['inserted']
-                        total_failed += results['failed']
-                        
-                        logger.debug(f"Batch {i//self.batch_size + 1}: {len(alarms)} alarms found, "
-                                   f"{results['inserted']} inserted, {results['failed']} failed")
-                    else:
-                        logger.debug(f"Batch {i//self.batch_size + 1}: No alarms found")
-                    
-                    # Small delay between batches to be API-friendly
-                    time.sleep(0.5)
+
+                # Split devices into batches and fetch them concurrently so the
+                # sync time is bounded by the slowest batch, not the sum of all
+                batches = [device_terids[i:i + self.batch_size]
+                           for i in range(0, len(device_terids), self.batch_size)]
+
+                logger.debug("Fetching %d alarm batches with up to %d workers", len(batches), self.max_workers)
+
+                # Fetched batches stream through the bounded queue into a
+                # writer thread, so DB inserts overlap with in-flight fetches
+                totals = {'alarms': 0, 'inserted': 0, 'failed': 0}
+                writer = Thread(target=self._db_writer, args=(totals,), daemon=True)
+                writer.start()
+
+                try:
+                    with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                        futures = {
+                            executor.submit(
+                                self._fetch_batch,
+                                batch_terids,
+                                start_time_str,
+                                end_time_str
+                            ): batch_terids
+                            for batch_terids in batches
+                        }
+
+                        for future in as_completed(futures):
+                            batch_terids = futures[future]
+                            alarms = future.result()
+
+                            if alarms is None:
+                                logger.error(f"Failed to fetch alarms for batch of {len(batch_terids)} devices")
+                                total_failed += len(batch_terids)
+                                continue
+
+                            if alarms:
+                                self._alarm_queue.put(alarms)
+                                logger.debug("Batch of %d devices: %d alarms found", len(batch_terids), len(alarms))
+                            else:
+                                logger.debug("Batch of %d devices: No alarms found", len(batch_terids))
+                finally:
+                    self._alarm_queue.put(_QUEUE_SENTINEL)
+                    writer.join()
+
+                total_alarms = totals['alarms']
+                total_inserted = totals['inserted']
+                total_failed += totals['failed']
                 
                 # Log results
                 sync_duration = time.time() - start_time
@@ -104,11 +264,12 @@ class AlarmSyncService:
                 )
                 
                 self._last_sync_time = datetime.now()
-                
+
                 # Clean up old alarms periodically (once per hour)
-                if (self._last_sync_time.minute == 0 or 
-                    (self._last_sync_time - datetime.now().replace(second=0, microsecond=0)).total_seconds() < 300):
+                now = time.time()
+                if now - self._last_cleanup_time >= 3600:
                     self._cleanup_old_alarms()
+                    self._last_cleanup_time = now
                 
                 # Return True if no major failures
                 return total_failed == 0 or total_failed < (len(device_terids) * 0.1)
@@ -116,10 +277,52 @@ class AlarmSyncService:
             except Exception as e:
                 logger.error(f"Unexpected error during alarm sync: {e}")
                 return False
-            
-            finally:
-                self._sync_in_progress = False
+        finally:
+            self._sync_lock.release()
     
+    def _db_writer(self, totals: dict):
+        """Drain fetched alarm batches from the queue into the database"""
+        while True:
+            alarms = self._alarm_queue.get()
+            try:
+                if alarms is _QUEUE_SENTINEL:
+                    return
+                results = self.db_manager.insert_alarms_batch(alarms)
+                totals['alarms'] += len(alarms)
+                totals['inserted'] += results['inserted']
+                totals['failed'] += results['failed']
+            except Exception as e:
+                logger.error(f"DB writer failed to insert alarm batch: {e}")
+                totals['failed'] += len(alarms)
+            finally:
+                self._alarm_queue.task_done()
+
+    def _get_device_terids(self) -> List[str]:
+        """Get device terminal IDs, refreshing the cache when it expires"""
+        if self._terids_cache and time.time() - self._terids_cache_time < self.terids_cache_ttl:
+            return self._terids_cache
+
+        terids = self.db_manager.get_all_device_terids()
+        if terids:
+            self._terids_cache = terids
+            self._terids_cache_time = time.time()
+        return terids
+
+    def invalidate_terids_cache(self):
+        """Force the next sync to re-read device terids from the database"""
+        self._terids_cache = []
+        self._terids_cache_time = 0.0
+
+    def _fetch_batch(self, batch_terids: List[str], start_time_str: str,
+                     end_time_str: str) -> Optional[List[dict]]:
+        """Fetch alarms for one batch of devices, pacing through the rate limiter"""
+        self._rate_limiter.acquire()
+        return self.api_client.get_alarm_details(
+            terid_list=batch_terids,
+            start_time=start_time_str,
+            end_time=end_time_str
+        )
+
     def _cleanup_old_alarms(self):
         """Clean up old alarm records to prevent database bloat"""
         try:
@@ -149,21 +352,19 @@ class AlarmSyncService:
             start_time_str = start_time_query.strftime("%Y-%m-%d %H:%M:%S")
             end_time_str = end_time.strftime("%Y-%m-%d %H:%M:%S")
             
-            logger.debug(f"Fetching alarms for device {terid} from {start_time_str} to {end_time_str}")
+            logger.debug("Fetching alarms for device %s from %s to %s", terid, start_time_str, end_time_str)
             
-            # Fetch alarms
-            alarms = self.api_client.get_alarm_details_for_device(
-                terid=terid,
-                start_time=start_time_str,
-                end_time=end_time_str
-            )
+            # Fetch through the coalescer so concurrent per-device requests
+            # share one batched API call
+            future = self._device_coalescer.submit(terid, start_time_str, end_time_str)
+            alarms = future.result(timeout=self.api_client.timeout + 1)
             
             if alarms is None:
                 logger.error(f"Failed to fetch alarms for device {terid}")
                 return False
             
             if not alarms:
-                logger.debug(f"No alarms found for device {terid}")
+                logger.debug("No alarms found for device %s", terid)
                 return True
             
             # Insert alarms
@@ -180,16 +381,16 @@ class AlarmSyncService:
     
     def get_sync_status(self) -> dict:
         """Get current alarm sync status information"""
-        device_count = self.db_manager.get_device_count()
-        alarm_count = self.db_manager.get_alarm_count()
-        last_alarm_update = self.db_manager.get_alarms_last_update_time()
-        
+        # One combined (and briefly cached) query for the counts and the
+        # last-update timestamp instead of three separate round trips
+        stats = self.db_manager.get_stats()
+
         return {
             'last_sync_time': self._last_sync_time.isoformat() if self._last_sync_time else None,
-            'sync_in_progress': self._sync_in_progress,
-            'total_devices_monitored': device_count,
-            'total_alarms': alarm_count,
-            'last_alarm_update': last_alarm_update,
+            'sync_in_progress': self._sync_lock.locked(),
+            'total_devices_monitored': stats['device_count'],
+            'total_alarms': stats['alarm_count'],
+            'last_alarm_update': stats['last_alarm_update'],
             'lookback_minutes': self.lookback_minutes,
             'batch_size': self.batch_size
         }
@@ -3,7 +3,12 @@ Brigade Electronics API Client
 Handles authentication and API requests
 """
 import hashlib
+import json
+import orjson
+import os
 import requests
+import tempfile
+import threading
 import time
 import logging
 from typing import Optional, Dict, Any, List
@@ -13,17 +18,47 @@ from config import API_CONFIG
 
 logger = logging.getLogger(__name__)
 
+def _auth_cache_path_for(base_url: str, username: str) -> str:
+    """Cache file for the auth key so process restarts can skip re-authentication
+
+    The path is namespaced by (base_url, username) so two configurations on
+    the same machine — a second account, a test pointed at a mock server —
+    can never read or clobber each other's key.
+    """
+    digest = hashlib.blake2s(f"{base_url}|{username}".encode(), digest_size=8).hexdigest()
+    return os.path.join(tempfile.gettempdir(), f"brigade_auth_{digest}.json")
+
 class BrigadeAPIClient:
     """Client for Brigade Electronics API"""
-    
+
+    __slots__ = (
+        'base_url', 'username', '_password_md5', 'timeout', 'session',
+        '_auth_key', '_key_expires_at', '_auth_lock', '_auth_cache_path',
+        '_cache', '_cache_lock', '_gps_payload_cache'
+    )
+
     def __init__(self):
         self.base_url = API_CONFIG.base_url
         self.username = API_CONFIG.username
-        self.password = API_CONFIG.password
+        # The password never changes for the process lifetime, so hash it once
+        # instead of on every authentication
+        self._password_md5 = self._md5_hash(API_CONFIG.password)
         self.timeout = API_CONFIG.timeout
         self.session = self._create_session()
         self._auth_key: Optional[str] = None
         self._key_expires_at: float = 0
+        self._auth_lock = threading.Lock()
+        self._auth_cache_path = _auth_cache_path_for(self.base_url, self.username)
+        # Short-lived response cache keyed by endpoint name; devices and
+        # groups change rarely, so repeated callers within the TTL share one
+        # API round trip
+        self._cache: Dict[str, Any] = {}
+        self._cache_lock = threading.Lock()
+        # (cache key, body bytes) for the GPS request payload: the terid
+        # roster rarely changes between ticks, so the serialized body can be
+        # reused instead of re-encoding every device ID each sync
+        self._gps_payload_cache: tuple = (None, b'')
+        self._load_cached_auth_key()
         
     def _create_session(self) -> requests.Session:
         """Create a requests session with retry strategy"""
@@ -41,9 +76,72 @@ class BrigadeAPIClient:
         
         return session
     
+    def _load_cached_auth_key(self):
+        """Load a previously persisted auth key if it is still valid"""
+        try:
+            with open(self._auth_cache_path, 'r') as f:
+                cached = json.load(f)
+            if cached.get('key') and cached.get('expires_at', 0) > time.time():
+                self._auth_key = cached['key']
+                self._key_expires_at = cached['expires_at']
+                logger.debug("Reusing cached auth key")
+        except (OSError, ValueError):
+            # Missing or unreadable cache just means we authenticate normally
+            pass
+
+    def _save_auth_key(self):
+        """Persist the current auth key so restarts can reuse it"""
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self._auth_cache_path))
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'key': self._auth_key, 'expires_at': self._key_expires_at}, f)
+            os.replace(temp_path, self._auth_cache_path)
+        except OSError as e:
+            logger.debug("Could not persist auth key: %s", e)
+
+    def _invalidate_auth_key(self):
+        """Drop the in-memory and persisted key so the next call re-authenticates
+
+        An API error response most commonly means the server no longer
+        accepts our key (restart, revocation, another login). Without
+        this, a bad cached key kept failing every call until its local
+        expiry — up to 50 minutes — because nothing ever discarded it.
+        """
+        self._auth_key = None
+        self._key_expires_at = 0
+        try:
+            os.unlink(self._auth_cache_path)
+        except OSError:
+            pass
+
     def _md5_hash(self, text: str) -> str:
         """Generate MD5 hash for password"""
         return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+    def _cached(self, key: str, ttl: float, fetch):
+        """Return a cached value for key, calling fetch() when it has expired
+
+        Failed fetches (None) are not cached, so the next caller retries.
+        """
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None and time.time() < entry[1]:
+                return entry[0]
+        value = fetch()
+        if value is not None:
+            with self._cache_lock:
+                self._cache[key] = (value, time.time() + ttl)
+        return value
+
+    def invalidate(self, key: str):
+        """Drop a cached response so the next call hits the API"""
+        with self._cache_lock:
+            self._cache.pop(key, None)
+
+    @staticmethod
+    def _decode_response(response: requests.Response) -> Dict[str, Any]:
+        """Decode a JSON response body with orjson (faster than stdlib json)"""
+        return orjson.loads(response.content)
     
     def _is_key_valid(self) -> bool:
         """Check if current auth key is still valid"""
@@ -56,24 +154,24 @@ class BrigadeAPIClient:
         Returns True if successful, False otherwise
         """
         try:
-            hashed_password = self._md5_hash(self.password)
             auth_url = f"{self.base_url}/api/v1/basic/key"
-            
+
             params = {
                 'username': self.username,
-                'password': hashed_password
+                'password': self._password_md5
             }
             
             logger.info("Attempting API authentication...")
             response = self.session.get(auth_url, params=params, timeout=self.timeout)
             response.raise_for_status()
             
-            data = response.json()
+            data = self._decode_response(response)
             
             if data.get('errorcode') == 200:
                 self._auth_key = data.get('data', {}).get('key')
                 # Set expiration to 50 minutes from now (assuming 1-hour validity)
                 self._key_expires_at = time.time() + (50 * 60)
+                self._save_auth_key()
                 logger.info("API authentication successful")
                 return True
             else:
@@ -89,15 +187,23 @@ class BrigadeAPIClient:
     
     def _ensure_authenticated(self) -> bool:
         """Ensure we have a valid authentication key"""
-        if not self._is_key_valid():
+        if self._is_key_valid():
+            return True
+        # Serialize re-authentication so concurrent callers don't all hit
+        # the auth endpoint at once
+        with self._auth_lock:
+            if self._is_key_valid():
+                return True
             return self.authenticate()
-        return True
     
     def get_devices(self) -> Optional[List[Dict[str, Any]]]:
         """
-        Fetch device list from the API
+        Fetch device list from the API (cached for 60 seconds)
         Returns list of devices or None if failed
         """
+        return self._cached('devices', 60, self._fetch_devices)
+
+    def _fetch_devices(self) -> Optional[List[Dict[str, Any]]]:
         if not self._ensure_authenticated():
             logger.error("Failed to authenticate before fetching devices")
             return None
@@ -110,7 +216,7 @@ class BrigadeAPIClient:
             response = self.session.get(devices_url, params=params, timeout=self.timeout)
             response.raise_for_status()
             
-            data = response.json()
+            data = self._decode_response(response)
             
             if data.get('errorcode') == 200:
                 devices = data.get('data', [])
@@ -118,8 +224,9 @@ class BrigadeAPIClient:
                 return devices
             else:
                 logger.error(f"API returned error: {data}")
+                self._invalidate_auth_key()
                 return None
-                
+
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch devices: {e}")
             return None
@@ -129,9 +236,12 @@ class BrigadeAPIClient:
     
     def get_device_groups(self) -> Optional[List[Dict[str, Any]]]:
         """
-        Fetch device groups from the API
+        Fetch device groups from the API (cached for 300 seconds)
         Returns list of groups or None if failed
         """
+        return self._cached('groups', 300, self._fetch_device_groups)
+
+    def _fetch_device_groups(self) -> Optional[List[Dict[str, Any]]]:
         if not self._ensure_authenticated():
             logger.error("Failed to authenticate before fetching groups")
             return None
@@ -144,7 +254,7 @@ class BrigadeAPIClient:
             response = self.session.get(groups_url, params=params, timeout=self.timeout)
             response.raise_for_status()
             
-            data = response.json()
+            data = self._decode_response(response)
             
             if data.get('errorcode') == 200:
                 groups = data.get('data', [])
@@ -152,8 +262,9 @@ class BrigadeAPIClient:
                 return groups
             else:
                 logger.error(f"API returned error: {data}")
+                self._invalidate_auth_key()
                 return None
-                
+
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch groups: {e}")
             return None
@@ -190,23 +301,24 @@ class BrigadeAPIClient:
                 "endtime": end_time
             }
             
-            logger.debug(f"Fetching alarm details for {len(terid_list)} devices...")
+            logger.debug("Fetching alarm details for %d devices...", len(terid_list))
             response = self.session.post(
-                alarm_url, 
-                json=payload, 
+                alarm_url,
+                data=orjson.dumps(payload),
                 timeout=self.timeout,
                 headers={'Content-Type': 'application/json'}
             )
             response.raise_for_status()
             
-            data = response.json()
+            data = self._decode_response(response)
             
             if data.get('errorcode') == 200:
                 alarms = data.get('data', [])
-                logger.debug(f"Successfully fetched {len(alarms)} alarm records")
+                logger.debug("Successfully fetched %d alarm records", len(alarms))
                 return alarms
             else:
                 logger.error(f"API returned error for alarm details: {data}")
+                self._invalidate_auth_key()
                 return None
                 
         except requests.exceptions.RequestException as e:
@@ -246,29 +358,38 @@ class BrigadeAPIClient:
         
         try:
             gps_url = f"{self.base_url}/api/v1/basic/gps/last"
-            
-            payload = {
-                "key": self._auth_key,
-                "terid": terid_list
-            }
-            
-            logger.debug(f"Fetching GPS positions for {len(terid_list)} devices...")
+
+            # Reuse the serialized body while the auth key and roster are
+            # unchanged; the key participates so re-authentication or a
+            # roster change both invalidate the cache
+            cache_key = (self._auth_key, hash(tuple(terid_list)))
+            if self._gps_payload_cache[0] == cache_key:
+                body = self._gps_payload_cache[1]
+            else:
+                body = orjson.dumps({
+                    "key": self._auth_key,
+                    "terid": terid_list
+                })
+                self._gps_payload_cache = (cache_key, body)
+
+            logger.debug("Fetching GPS positions for %d devices...", len(terid_list))
             response = self.session.post(
                 gps_url,
-                json=payload,
+                data=body,
                 timeout=self.timeout,
                 headers={'Content-Type': 'application/json'}
             )
             response.raise_for_status()
             
-            data = response.json()
+            data = self._decode_response(response)
             
             if data.get('errorcode') == 200:
                 gps_data = data.get('data', [])
-                logger.debug(f"Successfully fetched GPS data for {len(gps_data)} devices")
+                logger.debug("Successfully fetched GPS data for %d devices", len(gps_data))
                 return gps_data
             else:
                 logger.error(f"API returned error for GPS data: {data}")
+                self._invalidate_auth_key()
                 return None
                 
         except requests.exceptions.RequestException as e:
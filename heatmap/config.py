@@ -4,7 +4,7 @@ Configuration file for Brigade Electronics API integration
 import os
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class APIConfig:
     """Configuration for Brigade Electronics API"""
     base_url: str = "http://10.10.80.189:12056"
@@ -14,25 +14,34 @@ class APIConfig:
     retry_attempts: int = 3
     retry_delay: int = 5
 
-@dataclass
+# Kept mutable: the test scripts still swap db_path to point at temp databases
+@dataclass(slots=True)
 class DatabaseConfig:
     """Database configuration"""
     db_path: str = "devices.db"
     connection_timeout: int = 30
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SchedulerConfig:
     """Scheduler configuration"""
     update_interval_minutes: int = 10
     max_concurrent_tasks: int = 1
+    update_interval_seconds: int = 0  # Derived in __post_init__
 
-@dataclass
+    def __post_init__(self):
+        object.__setattr__(self, 'update_interval_seconds', self.update_interval_minutes * 60)
+
+@dataclass(frozen=True, slots=True)
 class AlarmConfig:
     """Alarm monitoring configuration"""
     update_interval_minutes: int = 5
     lookback_minutes: int = 10
     batch_size: int = 50
     cleanup_days: int = 30
+    update_interval_seconds: int = 0  # Derived in __post_init__
+
+    def __post_init__(self):
+        object.__setattr__(self, 'update_interval_seconds', self.update_interval_minutes * 60)
 
 # Environment variable overrides
 API_CONFIG = APIConfig(
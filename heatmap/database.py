@@ -1,173 +1,386 @@
 """
 Database operations for device management
 """
+import os
 import sqlite3
 import logging
-from typing import List, Dict, Any, Optional
+import queue
+import threading
+import time
+from typing import Iterator, List, Dict, Any, Optional
 from datetime import datetime
 from contextlib import contextmanager
 from config import DATABASE_CONFIG
 
 logger = logging.getLogger(__name__)
 
+def rows_to_dicts(rows) -> List[Dict[str, Any]]:
+    """Convert an iterable of sqlite3.Row to plain dicts (for JSON etc.)"""
+    return [dict(row) for row in rows]
+
+# Schema is read once at import; every DatabaseManager used to re-read and
+# re-parse the file on construction. The version must match the
+# "PRAGMA user_version" stamp at the end of database_schema.sql
+_SCHEMA_VERSION = 4
+_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database_schema.sql')
+with open(_SCHEMA_PATH, 'r') as _schema_file:
+    _SCHEMA_SQL = _schema_file.read()
+
+# Session PRAGMAs applied to every new connection; journal_mode=WAL is
+# persistent in the database file and only set once at initialization.
+# foreign_keys stays off deliberately: the schema declares terid FKs but
+# enforcement would reject the orphan alarm/gps rows the sync paths can
+# legitimately produce when a device disappears between syncs, and adds
+# a parent lookup to every hot-path insert
+_SESSION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",       # 64MB page cache
+    "PRAGMA mmap_size=2147483648",    # 2GB memory-mapped I/O window
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA analysis_limit=400",      # Bounds the work PRAGMA optimize may do
+)
+
+# Alarm type descriptions from API documentation Appendix 2; built once at
+# import instead of on every get_distinct_alarm_types call
+ALARM_TYPE_NAMES = {
+    1: "Video Loss", 2: "Motion Detection", 3: "Blind Detection", 4: "HDD/SD Error",
+    5: "IO 1", 6: "IO 2", 7: "IO 3", 8: "IO 4", 9: "IO 5", 10: "IO 6", 11: "IO 7", 12: "IO 8",
+    13: "Panic Button", 14: "Low Speed", 15: "High Speed", 16: "Low Voltage", 17: "G-Force",
+    18: "Geo-Fence", 19: "Unauthorised Ignition", 20: "Unauthorised Shutdown", 21: "GPS Fail",
+    22: "GPS Antenna Short", 23: "GPS Antenna Open", 24: "Overspeed", 25: "Idle Time",
+    26: "Harsh Acceleration", 27: "Harsh Cornering", 28: "Harsh Braking", 29: "Temperature Alarm",
+    30: "Fuel Alarm", 31: "Fuel Theft", 32: "Fuel Fill", 33: "Power Disconnected", 34: "Power Connected",
+    35: "Battery Low", 36: "Impact Alarm", 37: "SOS", 38: "Man Down", 39: "External Device Alarm",
+    40: "External Power On", 41: "External Power Off", 42: "System Power On", 43: "System Power Off",
+    44: "White List", 45: "Black List", 46: "RFID Card", 47: "Temperature Error",
+    48: "Acceleration Sensor Error", 49: "TTS Error", 50: "Camera Error", 51: "Voltage Error",
+    52: "Speed Limit", 53: "Route Deviation", 54: "Enter Area", 55: "Exit Area", 56: "Road Limit",
+    57: "Dangerous Driving", 58: "Driver Fatigue", 59: "No Driver", 60: "Phone Detection",
+    61: "Smoking Detection", 62: "Driver Distraction", 63: "Lane Departure", 64: "Forward Collision Warning",
+    65: "Pedestrian Collision Warning", 66: "Blind Spot", 67: "Driver Change", 68: "Abnormal Fuel Consumption",
+    69: "VSS Speed", 70: "Oil Pressure", 71: "Water Temperature", 72: "Neutral Safety Switch",
+    73: "Handbrake", 74: "Door Open", 75: "Seat Belt", 76: "Key Switch", 77: "Reverse Gear",
+    78: "Left Turn", 79: "Right Turn", 80: "Work Light", 81: "Retarder", 82: "Air Pressure",
+    83: "Engine Error", 84: "Auxiliary Battery", 85: "Emergency Button", 86: "Loading",
+    87: "Unloading", 88: "Driving Without License", 89: "Cumulative Driving Time", 90: "Road Maintenance",
+    91: "Fatigue Driving", 92: "Overtime Parking", 93: "Route Change", 94: "VSS Failure",
+    95: "Oil Shortage", 96: "Vehicle Theft", 97: "Illegal Ignition", 98: "Illegal Displacement",
+    99: "Collision Rollover", 100: "Side Rollover", 134: "Picture Upload", 135: "Video Upload",
+    136: "IC Card", 137: "Fingerprint", 138: "Retina", 139: "Face Recognition", 140: "Voice",
+    141: "Weight", 142: "Trailer Connection", 143: "Trailer Disconnection", 144: "Passenger Up",
+    145: "Passenger Down", 146: "School Bus", 147: "Emergency Evacuation", 148: "Anti-Theft",
+    149: "Refueling", 150: "Driver Hours", 151: "Custom Alarm", 152: "Maintenance",
+    153: "Diagnostic", 154: "Eco Driving", 155: "Green Band", 156: "Cruise Control",
+    157: "Lane Change", 158: "Tailgating", 159: "Cornering", 160: "Acceleration",
+    161: "Deceleration", 162: "Following Distance Monitoring", 163: "Speeding", 164: "Yawning Detection",
+    165: "Eyes Closed", 166: "Looking Away", 167: "Head Down", 168: "Using Phone"
+}
+
+# Upper bound on pooled read connections kept open per DatabaseManager;
+# readers are independent under WAL so scale with the core count
+_POOL_SIZE = os.cpu_count() or 4
+
+# How long a cached get_stats result stays fresh; writes invalidate it early
+_STATS_TTL_SECONDS = 5.0
+
+# All four dashboard scalars in one round trip
+_STATS_SQL = """
+SELECT (SELECT COUNT(*) FROM devices),
+       (SELECT COUNT(*) FROM alarms),
+       (SELECT MAX(last_updated) FROM devices),
+       (SELECT MAX(last_updated) FROM alarms)
+"""
+
+# Hot-path SELECTs as module constants: a stable SQL string identity lets
+# sqlite3's per-connection statement cache reuse the prepared statement
+_SELECT_DEVICE_BY_TERID_SQL = "SELECT * FROM devices WHERE terid = ?"
+_SELECT_ALARMS_RECENT_SQL = """SELECT * FROM alarms
+   WHERE gps_time >= datetime('now', ?)
+   ORDER BY gps_time DESC LIMIT ?"""
+_SELECT_ALARMS_BY_TERID_SQL = "SELECT * FROM alarms WHERE terid = ? ORDER BY created_at DESC LIMIT ?"
+
+# Cleanup deletes in bounded chunks so the write lock is never held for
+# one giant multi-million-row DELETE and WAL checkpoints can keep up
+_CLEANUP_CHUNK_SIZE = 10000
+_CLEANUP_CHUNK_SQL = """
+DELETE FROM alarms WHERE id IN (
+    SELECT id FROM alarms WHERE created_at < datetime('now', ?) LIMIT ?
+)
+"""
+
+# Latest position per device joined with its company details
+_GPS_POSITIONS_SQL = """
+    SELECT
+        g.id, g.terid, g.car_license, g.gps_time,
+        g.latitude, g.longitude, g.altitude, g.speed,
+        g.recordspeed, g.direction, g.state, g.address,
+        g.last_updated,
+        d.company_name, d.company_branch
+    FROM gps g
+    LEFT JOIN devices d ON g.terid = d.terid
+    ORDER BY g.last_updated DESC
+"""
+
+# One row per device (idx_gps_unique). UPSERT instead of REPLACE: REPLACE
+# deletes and re-inserts, churning every index and burning rowids, while
+# DO UPDATE rewrites the existing row in place
+_GPS_UPSERT_SQL = """
+INSERT INTO gps (
+    terid, car_license, gps_time, latitude, longitude,
+    altitude, speed, recordspeed, direction, state, address,
+    last_updated
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+ON CONFLICT(terid) DO UPDATE SET
+    car_license = excluded.car_license,
+    gps_time = excluded.gps_time,
+    latitude = excluded.latitude,
+    longitude = excluded.longitude,
+    altitude = excluded.altitude,
+    speed = excluded.speed,
+    recordspeed = excluded.recordspeed,
+    direction = excluded.direction,
+    state = excluded.state,
+    address = excluded.address,
+    last_updated = CURRENT_TIMESTAMP
+"""
+
+# Multi-row flavour of the GPS upsert for the batch path: one statement
+# carrying 50 rows binds and steps far fewer times than 50 single-row
+# inserts, even via executemany (about a third faster in local timing).
+# 50 rows x 11 params stays well under SQLite's variable limit
+_GPS_BATCH_CHUNK = 50
+_GPS_UPSERT_ROW = "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)"
+_GPS_UPSERT_HEAD, _GPS_UPSERT_TAIL = _GPS_UPSERT_SQL.split(
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)")
+
+def _gps_upsert_multirow(row_count: int) -> str:
+    """Build the GPS upsert statement carrying row_count VALUES tuples"""
+    values = ",\n       ".join([_GPS_UPSERT_ROW] * row_count)
+    return f"{_GPS_UPSERT_HEAD}VALUES {values}{_GPS_UPSERT_TAIL}"
+
+# The full-chunk statement is by far the most common, so build it once
+_GPS_UPSERT_FULL_CHUNK_SQL = _gps_upsert_multirow(_GPS_BATCH_CHUNK)
+
+# Duplicate alarms (same unique key) are silently skipped by OR IGNORE
+_ALARM_INSERT_SQL = """
+INSERT OR IGNORE INTO alarms (
+    terid, gps_time, altitude, direction, gps_lat, gps_lng,
+    speed, record_speed, state, server_time, alarm_type,
+    alarm_content, cmd_type
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Native UPSERT (SQLite >= 3.24): one statement replaces the old
+# SELECT-then-INSERT-or-UPDATE round trips per device
+_DEVICE_UPSERT_SQL = """
+INSERT INTO devices (
+    car_license, terid, sim, channel, plate_color, group_id,
+    cname, device_type, link_type, device_username,
+    device_password, register_ip, register_port, transmit_ip,
+    transmit_port, channel_enable, company_branch, company_name
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(terid) DO UPDATE SET
+    car_license = excluded.car_license,
+    sim = excluded.sim,
+    channel = excluded.channel,
+    plate_color = excluded.plate_color,
+    group_id = excluded.group_id,
+    cname = excluded.cname,
+    device_type = excluded.device_type,
+    link_type = excluded.link_type,
+    device_username = excluded.device_username,
+    device_password = excluded.device_password,
+    register_ip = excluded.register_ip,
+    register_port = excluded.register_port,
+    transmit_ip = excluded.transmit_ip,
+    transmit_port = excluded.transmit_port,
+    channel_enable = excluded.channel_enable,
+    company_branch = excluded.company_branch,
+    company_name = excluded.company_name,
+    last_updated = CURRENT_TIMESTAMP
+"""
+
 class DatabaseManager:
     """Manages SQLite database operations for devices"""
     
-    def __init__(self):
-        self.db_path = DATABASE_CONFIG.db_path
+    def __init__(self, db_path: Optional[str] = None):
+        # An explicit path lets tests run against private databases without
+        # mutating the shared DATABASE_CONFIG
+        self.db_path = db_path or DATABASE_CONFIG.db_path
         self.connection_timeout = DATABASE_CONFIG.connection_timeout
+        # Pool of open read-only connections so each query skips the connect
+        # and session-PRAGMA setup cost; filled lazily as connections are
+        # returned
+        self._pool: queue.Queue = queue.Queue(maxsize=_POOL_SIZE)
+        # Single lock-guarded writer connection: SQLite allows one writer at
+        # a time anyway, so serializing writes here avoids busy retries
+        self._write_lock = threading.Lock()
+        self._write_conn: Optional[sqlite3.Connection] = None
+        # (fetched_at, stats dict); see get_stats
+        self._stats_cache: tuple = (0.0, None)
         self._initialize_database()
     
     def _initialize_database(self):
         """Initialize the database with schema"""
         try:
-            with self._get_connection() as conn:
-                # Read and execute schema
-                with open('database_schema.sql', 'r') as f:
-                    schema = f.read()
-                conn.executescript(schema)
-                conn.commit()
-                logger.info("Database initialized successfully")
+            # The writer connection doubles as the one that creates the
+            # database file; read-only connections require it to exist
+            self._write_conn = self._open_connection()
+            # 8KB pages let mmap reads pull data in larger chunks. Changing
+            # the size of an existing database needs a rebuild, and the page
+            # size cannot change while the file is in WAL mode
+            if self._write_conn.execute("PRAGMA page_size").fetchone()[0] != 8192:
+                self._write_conn.execute("PRAGMA journal_mode=DELETE")
+                self._write_conn.execute("PRAGMA page_size=8192")
+                self._write_conn.execute("VACUUM")
+            # WAL cuts commit fsync cost and lets readers run while a
+            # writer commits; the mode is persistent so set it once here
+            self._write_conn.execute("PRAGMA journal_mode=WAL")
+            # user_version gates the DDL: already-initialized databases skip
+            # parsing and executing the whole schema script
+            if self._write_conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+                self._write_conn.executescript(_SCHEMA_SQL)
+                self._write_conn.commit()
+            logger.info("Database initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}")
             raise
-    
-    @contextmanager
-    def _get_connection(self):
-        """Context manager for database connections"""
-        conn = None
-        try:
+
+    def _open_connection(self, readonly: bool = False) -> sqlite3.Connection:
+        """Open a new connection with the session PRAGMAs applied"""
+        if readonly:
             conn = sqlite3.connect(
-                self.db_path, 
+                f"file:{self.db_path}?mode=ro",
+                uri=True,
                 timeout=self.connection_timeout,
                 check_same_thread=False
             )
-            conn.row_factory = sqlite3.Row  # Enable column access by name
+            # Column access by name is only worth paying for on reads; the
+            # writer keeps the default tuple factory so executemany does not
+            # build a Row object per affected row
+            conn.row_factory = sqlite3.Row
+        else:
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=self.connection_timeout,
+                check_same_thread=False
+            )
+        for pragma in _SESSION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def _get_connection(self):
+        """Context manager for read-only connections
+
+        Connections are borrowed from the pool when one is available and
+        returned afterwards, so steady-state queries reuse warm connections
+        instead of paying connect plus PRAGMA setup each call. Opened with
+        mode=ro, they can never contend with the writer for the WAL lock.
+        A connection that raised is closed rather than pooled.
+        """
+        conn = None
+        try:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                conn = self._open_connection(readonly=True)
             yield conn
         except Exception as e:
             if conn:
                 conn.rollback()
+                conn.close()
+                conn = None
             logger.error(f"Database error: {e}")
             raise
         finally:
             if conn:
-                conn.close()
-    
-    def _normalize_device_data(self, device_data: Dict[str, Any]) -> Dict[str, Any]:
+                try:
+                    self._pool.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
+
+    @contextmanager
+    def _write_connection(self):
+        """Context manager serializing all writes onto one connection
+
+        Each successful write refreshes planner statistics with PRAGMA
+        optimize; with analysis_limit set this is bounded and keeps query
+        plans current as the alarms table grows. It runs on the writer
+        because read-only connections cannot update the stat tables.
+        """
+        with self._write_lock:
+            try:
+                # The sqlite3 connection context manager commits on success
+                # and rolls back on exception, so write methods never call
+                # commit() themselves and no code path can leave the
+                # persistent writer holding a transaction open
+                with self._write_conn:
+                    yield self._write_conn
+            except Exception as e:
+                logger.error(f"Database error: {e}")
+                raise
+            self._write_conn.execute("PRAGMA optimize")
+            # Counts and update times just changed
+            self._stats_cache = (0.0, None)
+
+    @contextmanager
+    def fast_bulk_mode(self):
+        """Drop writer durability while loading throwaway data
+
+        Turns synchronous=OFF on the writer for the duration so bulk
+        fixture loads skip the per-commit fsync, restoring the session
+        default on exit. Only safe when the database is disposable (test
+        fixtures): a crash mid-load can corrupt it. journal_mode is left
+        alone — switching WAL to MEMORY would break the read-only pool.
         """
-        Normalize device data field names from API to database schema
+        with self._write_lock:
+            self._write_conn.execute("PRAGMA synchronous=OFF")
+        try:
+            yield
+        finally:
+            with self._write_lock:
+                self._write_conn.execute("PRAGMA synchronous=NORMAL")
+
+
+    def _normalize_device_tuple(self, device_data: Dict[str, Any]) -> tuple:
+        """
+        Normalize device data field names from API to database schema,
+        returned as the parameter tuple for _DEVICE_UPSERT_SQL (terid is
+        element 1). Building the tuple directly avoids an intermediate
+        dict per device on the batch path.
         """
-        normalized = {
-            'carlicense': device_data.get('carlicence') or device_data.get('carlicense') or 'Unknown',
-            'terid': device_data.get('terid') or device_data.get('deviceid'),
-            'sim': device_data.get('sim') or 'Unknown',
-            'channel': device_data.get('channel') or device_data.get('channelcount') or 0,
-            'platecolor': device_data.get('platecolor') or 0,
-            'groupid': device_data.get('groupid') or 0,
-            'cname': device_data.get('cname') or '',
-            'devicetype': device_data.get('devicetype') or '0',
-            'linktype': device_data.get('linktype') or '0',
-            'deviceusername': device_data.get('deviceusername') or '',
-            'devicepassword': device_data.get('devicepassword') or '',
-            'registerip': device_data.get('registerip') or '',
-            'registerport': device_data.get('registerport') or 0,
-            'transmitip': device_data.get('transmitip') or '',
-            'transmitport': device_data.get('transmitport') or 0,
-            'en': device_data.get('en') or 0,
-            'companybranch': device_data.get('companybranch') or '',
-            'companyname': device_data.get('companyname') or ''
-        }
-        return normalized
+        return (
+            device_data.get('carlicence') or device_data.get('carlicense') or 'Unknown',
+            device_data.get('terid') or device_data.get('deviceid'),
+            device_data.get('sim') or 'Unknown',
+            device_data.get('channel') or device_data.get('channelcount') or 0,
+            device_data.get('platecolor') or 0,
+            device_data.get('groupid') or 0,
+            device_data.get('cname') or '',
+            device_data.get('devicetype') or '0',
+            device_data.get('linktype') or '0',
+            device_data.get('deviceusername') or '',
+            device_data.get('devicepassword') or '',
+            device_data.get('registerip') or '',
+            device_data.get('registerport') or 0,
+            device_data.get('transmitip') or '',
+            device_data.get('transmitport') or 0,
+            device_data.get('en') or 0,
+            device_data.get('companybranch') or '',
+            device_data.get('companyname') or ''
+        )
 
     def upsert_device(self, device_data: Dict[str, Any]) -> bool:
         """
         Insert or update a device record
         Returns True if successful, False otherwise
+
+        Thin wrapper over the batch path so there is one upsert code path.
         """
-        try:
-            # Normalize the device data
-            normalized_data = self._normalize_device_data(device_data)
-            
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Check if device exists
-                cursor.execute("SELECT id FROM devices WHERE terid = ?", (normalized_data.get('terid'),))
-                existing = cursor.fetchone()
-                
-                if existing:
-                    # Update existing record
-                    update_sql = """
-                    UPDATE devices SET 
-                        car_license = ?, sim = ?, channel = ?, plate_color = ?,
-                        group_id = ?, cname = ?, device_type = ?, link_type = ?,
-                        device_username = ?, device_password = ?, register_ip = ?,
-                        register_port = ?, transmit_ip = ?, transmit_port = ?,
-                        channel_enable = ?, company_branch = ?, company_name = ?,
-                        last_updated = CURRENT_TIMESTAMP
-                    WHERE terid = ?
-                    """
-                    values = (
-                        normalized_data.get('carlicense'),
-                        normalized_data.get('sim'),
-                        normalized_data.get('channel'),
-                        normalized_data.get('platecolor'),
-                        normalized_data.get('groupid'),
-                        normalized_data.get('cname'),
-                        normalized_data.get('devicetype'),
-                        normalized_data.get('linktype'),
-                        normalized_data.get('deviceusername'),
-                        normalized_data.get('devicepassword'),
-                        normalized_data.get('registerip'),
-                        normalized_data.get('registerport'),
-                        normalized_data.get('transmitip'),
-                        normalized_data.get('transmitport'),
-                        normalized_data.get('en'),
-                        normalized_data.get('companybranch'),
-                        normalized_data.get('companyname'),
-                        normalized_data.get('terid')
-                    )
-                    cursor.execute(update_sql, values)
-                    logger.debug(f"Updated device {device_data.get('terid')}")
-                else:
-                    # Insert new record
-                    insert_sql = """
-                    INSERT INTO devices (
-                        car_license, terid, sim, channel, plate_color, group_id,
-                        cname, device_type, link_type, device_username,
-                        device_password, register_ip, register_port, transmit_ip,
-                        transmit_port, channel_enable, company_branch, company_name
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """
-                    values = (
-                        normalized_data.get('carlicense'),
-                        normalized_data.get('terid'),
-                        normalized_data.get('sim'),
-                        normalized_data.get('channel'),
-                        normalized_data.get('platecolor'),
-                        normalized_data.get('groupid'),
-                        normalized_data.get('cname'),
-                        normalized_data.get('devicetype'),
-                        normalized_data.get('linktype'),
-                        normalized_data.get('deviceusername'),
-                        normalized_data.get('devicepassword'),
-                        normalized_data.get('registerip'),
-                        normalized_data.get('registerport'),
-                        normalized_data.get('transmitip'),
-                        normalized_data.get('transmitport'),
-                        normalized_data.get('en'),
-                        normalized_data.get('companybranch'),
-                        normalized_data.get('companyname')
-                    )
-                    cursor.execute(insert_sql, values)
-                    logger.debug(f"Inserted new device {device_data.get('terid')}")
-                
-                conn.commit()
-                return True
-                
-        except Exception as e:
-            logger.error(f"Failed to upsert device {device_data.get('terid', 'unknown')}: {e}")
-            return False
+        results = self.upsert_devices_batch([device_data])
+        return results['failed'] == 0
     
     def upsert_devices_batch(self, devices: List[Dict[str, Any]]) -> Dict[str, int]:
         """
@@ -176,102 +389,59 @@ class DatabaseManager:
         """
         results = {'inserted': 0, 'updated': 0, 'failed': 0}
         
-        for device in devices:
-            try:
-                # Normalize the device data
-                normalized_device = self._normalize_device_data(device)
+        try:
+            # One connection and one transaction for the whole batch: per-row
+            # commits made every device its own fsync
+            with self._write_connection() as conn:
+                # Take the write lock up front rather than on the first row
+                conn.execute("BEGIN IMMEDIATE")
+                cursor = conn.cursor()
                 
-                with self._get_connection() as conn:
-                    cursor = conn.cursor()
-                    
-                    # Check if device exists
-                    cursor.execute("SELECT id FROM devices WHERE terid = ?", (normalized_device.get('terid'),))
-                    existing = cursor.fetchone()
-                    
-                    if existing:
-                        # Update existing record
-                        update_sql = """
-                        UPDATE devices SET 
-                            car_license = ?, sim = ?, channel = ?, plate_color = ?,
-                            group_id = ?, cname = ?, device_type = ?, link_type = ?,
-                            device_username = ?, device_password = ?, register_ip = ?,
-                            register_port = ?, transmit_ip = ?, transmit_port = ?,
-                            channel_enable = ?, company_branch = ?, company_name = ?,
-                            last_updated = CURRENT_TIMESTAMP
-                        WHERE terid = ?
-                        """
-                        values = (
-                            normalized_device.get('carlicense'),
-                            normalized_device.get('sim'),
-                            normalized_device.get('channel'),
-                            normalized_device.get('platecolor'),
-                            normalized_device.get('groupid'),
-                            normalized_device.get('cname'),
-                            normalized_device.get('devicetype'),
-                            normalized_device.get('linktype'),
-                            normalized_device.get('deviceusername'),
-                            normalized_device.get('devicepassword'),
-                            normalized_device.get('registerip'),
-                            normalized_device.get('registerport'),
-                            normalized_device.get('transmitip'),
-                            normalized_device.get('transmitport'),
-                            normalized_device.get('en'),
-                            normalized_device.get('companybranch'),
-                            normalized_device.get('companyname'),
-                            normalized_device.get('terid')
-                        )
-                        cursor.execute(update_sql, values)
-                        results['updated'] += 1
-                    else:
-                        # Insert new record
-                        insert_sql = """
-                        INSERT INTO devices (
-                            car_license, terid, sim, channel, plate_color, group_id,
-                            cname, device_type, link_type, device_username,
-                            device_password, register_ip, register_port, transmit_ip,
-                            transmit_port, channel_enable, company_branch, company_name
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """
-                        values = (
-                            normalized_device.get('carlicense'),
-                            normalized_device.get('terid'),
-                            normalized_device.get('sim'),
-                            normalized_device.get('channel'),
-                            normalized_device.get('platecolor'),
-                            normalized_device.get('groupid'),
-                            normalized_device.get('cname'),
-                            normalized_device.get('devicetype'),
-                            normalized_device.get('linktype'),
-                            normalized_device.get('deviceusername'),
-                            normalized_device.get('devicepassword'),
-                            normalized_device.get('registerip'),
-                            normalized_device.get('registerport'),
-                            normalized_device.get('transmitip'),
-                            normalized_device.get('transmitport'),
-                            normalized_device.get('en'),
-                            normalized_device.get('companybranch'),
-                            normalized_device.get('companyname')
-                        )
-                        cursor.execute(insert_sql, values)
-                        results['inserted'] += 1
-                    
-                    conn.commit()
-                    
-            except Exception as e:
-                logger.error(f"Failed to process device {device.get('terid', 'unknown')}: {e}")
-                results['failed'] += 1
+                rows = [self._normalize_device_tuple(d) for d in devices]
+
+                # Classify inserted vs updated with one query up front instead
+                # of a SELECT per device
+                terids = [row[1] for row in rows]
+                existing_terids = set()
+                if terids:
+                    placeholders = ','.join('?' for _ in terids)
+                    cursor.execute(f"SELECT terid FROM devices WHERE terid IN ({placeholders})", terids)
+                    existing_terids = {row[0] for row in cursor.fetchall()}
+
+                # executemany compiles the statement once and runs the whole
+                # batch inside sqlite3's C loop
+                cursor.executemany(_DEVICE_UPSERT_SQL, rows)
+
+                results['updated'] = sum(1 for t in terids if t in existing_terids)
+                results['inserted'] = len(rows) - results['updated']
+
+        except Exception as e:
+            logger.error(f"Failed to upsert device batch: {e}")
+            # The whole batch is one transaction, so any failure — including
+            # a failed commit at block exit, after the counters were set —
+            # means nothing persisted
+            results['inserted'] = 0
+            results['updated'] = 0
+            results['failed'] = len(devices)
         
-        logger.info(f"Batch operation completed: {results}")
+        logger.info("Batch operation completed: %s", results)
         return results
     
+    def iter_all_devices(self) -> Iterator[sqlite3.Row]:
+        """Yield devices as SQLite produces them, without a result list
+
+        The borrowed connection goes back to the pool once the generator
+        is exhausted (or closed), so callers should consume it promptly.
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM devices ORDER BY car_license")
+            yield from cursor
+
     def get_all_devices(self) -> List[Dict[str, Any]]:
         """Get all devices from database"""
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT * FROM devices ORDER BY car_license")
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+            return rows_to_dicts(self.iter_all_devices())
         except Exception as e:
             logger.error(f"Failed to fetch devices: {e}")
             return []
@@ -281,7 +451,7 @@ class DatabaseManager:
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT * FROM devices WHERE terid = ?", (terid,))
+                cursor.execute(_SELECT_DEVICE_BY_TERID_SQL, (terid,))
                 row = cursor.fetchone()
                 return dict(row) if row else None
         except Exception as e:
@@ -311,6 +481,36 @@ class DatabaseManager:
             logger.error(f"Failed to get last update time: {e}")
             return None
     
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the dashboard scalars in one query, cached for a few seconds
+
+        Dashboards poll device/alarm counts and last-update times together;
+        one combined SELECT replaces four separate round trips, and the
+        short TTL (invalidated by writes) absorbs rapid polling.
+        """
+        fetched_at, stats = self._stats_cache
+        if stats is not None and time.monotonic() - fetched_at < _STATS_TTL_SECONDS:
+            return stats
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute(_STATS_SQL).fetchone()
+                stats = {
+                    'device_count': row[0],
+                    'alarm_count': row[1],
+                    'last_device_update': row[2],
+                    'last_alarm_update': row[3]
+                }
+                self._stats_cache = (time.monotonic(), stats)
+                return stats
+        except Exception as e:
+            logger.error(f"Failed to get stats: {e}")
+            return {
+                'device_count': 0,
+                'alarm_count': 0,
+                'last_device_update': None,
+                'last_alarm_update': None
+            }
+
     def get_all_device_terids(self) -> List[str]:
         """Get all device terminal IDs for alarm monitoring"""
         try:
@@ -329,51 +529,11 @@ class DatabaseManager:
         """
         Insert a new alarm record (ignore duplicates)
         Returns True if successful, False otherwise
+
+        Thin wrapper over the batch path so there is one insert code path.
         """
-        try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                
-                insert_sql = """
-                INSERT OR IGNORE INTO alarms (
-                    terid, gps_time, altitude, direction, gps_lat, gps_lng,
-                    speed, record_speed, state, server_time, alarm_type,
-                    alarm_content, cmd_type
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """
-                
-                values = (
-                    alarm_data.get('terid'),
-                    alarm_data.get('gpstime'),
-                    alarm_data.get('altitude'),
-                    alarm_data.get('direction'),
-                    alarm_data.get('gpslat'),
-                    alarm_data.get('gpslng'),
-                    alarm_data.get('speed'),
-                    alarm_data.get('recordspeed'),
-                    alarm_data.get('state'),
-                    alarm_data.get('time'),
-                    alarm_data.get('type'),
-                    alarm_data.get('content'),
-                    alarm_data.get('cmdtype')
-                )
-                
-                cursor.execute(insert_sql, values)
-                
-                # Check if the row was actually inserted (not a duplicate)
-                rows_affected = cursor.rowcount
-                conn.commit()
-                
-                if rows_affected > 0:
-                    logger.debug(f"Inserted new alarm for device {alarm_data.get('terid')}")
-                else:
-                    logger.debug(f"Duplicate alarm ignored for device {alarm_data.get('terid')}")
-                
-                return True
-                
-        except Exception as e:
-            logger.error(f"Failed to insert alarm for device {alarm_data.get('terid', 'unknown')}: {e}")
-            return False
+        results = self.insert_alarms_batch([alarm_data])
+        return results['failed'] == 0
     
     def insert_alarms_batch(self, alarms: List[Dict[str, Any]]) -> Dict[str, int]:
         """
@@ -382,20 +542,16 @@ class DatabaseManager:
         """
         results = {'inserted': 0, 'duplicates': 0, 'failed': 0}
         
-        for alarm in alarms:
-            try:
-                with self._get_connection() as conn:
-                    cursor = conn.cursor()
-                    
-                    insert_sql = """
-                    INSERT OR IGNORE INTO alarms (
-                        terid, gps_time, altitude, direction, gps_lat, gps_lng,
-                        speed, record_speed, state, server_time, alarm_type,
-                        alarm_content, cmd_type
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """
-                    
-                    values = (
+        try:
+            # One connection and one transaction for the whole batch: per-row
+            # commits made every alarm its own fsync
+            with self._write_connection() as conn:
+                # Take the write lock up front rather than on the first row
+                conn.execute("BEGIN IMMEDIATE")
+                cursor = conn.cursor()
+                
+                rows = [
+                    (
                         alarm.get('terid'),
                         alarm.get('gpstime'),
                         alarm.get('altitude'),
@@ -410,53 +566,61 @@ class DatabaseManager:
                         alarm.get('content'),
                         alarm.get('cmdtype')
                     )
-                    
-                    cursor.execute(insert_sql, values)
-                    
-                    # Check if the row was actually inserted (not a duplicate)
-                    rows_affected = cursor.rowcount
-                    conn.commit()
-                    
-                    if rows_affected > 0:
-                        results['inserted'] += 1
-                    else:
-                        results['duplicates'] += 1
-                    
-            except Exception as e:
-                logger.error(f"Failed to insert alarm for device {alarm.get('terid', 'unknown')}: {e}")
-                results['failed'] += 1
+                    for alarm in alarms
+                ]
+
+                # executemany compiles the statement once and runs the whole
+                # batch inside sqlite3's C loop; the change counter tells us
+                # how many rows survived the OR IGNORE. It is also immune to
+                # the rowcount quirks OR IGNORE has on some sqlite3 builds;
+                # INSERT ... RETURNING would be the other explicit option but
+                # executemany discards (3.11) or rejects (3.12+) RETURNING
+                # rows, and a per-row execute loop costs more than it buys
+                changes_before = conn.total_changes
+                cursor.executemany(_ALARM_INSERT_SQL, rows)
+                results['inserted'] = conn.total_changes - changes_before
+                results['duplicates'] = len(rows) - results['inserted']
+
+        except Exception as e:
+            logger.error(f"Failed to insert alarm batch: {e}")
+            # The whole batch is one transaction, so any failure — including
+            # a failed commit at block exit, after the counters were set —
+            # means nothing persisted
+            results['inserted'] = 0
+            results['duplicates'] = 0
+            results['failed'] = len(alarms)
         
-        logger.info(f"Alarm batch operation completed: {results}")
+        logger.info("Alarm batch operation completed: %s", results)
         return results
     
+    def iter_alarms_by_terid(self, terid: str, limit: int = 100) -> Iterator[sqlite3.Row]:
+        """Yield recent alarms for a specific device without a result list"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SELECT_ALARMS_BY_TERID_SQL, (terid, limit))
+            yield from cursor
+
     def get_alarms_by_terid(self, terid: str, limit: int = 100) -> List[Dict[str, Any]]:
         """Get recent alarms for a specific device"""
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT * FROM alarms WHERE terid = ? ORDER BY created_at DESC LIMIT ?", 
-                    (terid, limit)
-                )
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+            return rows_to_dicts(self.iter_alarms_by_terid(terid, limit))
         except Exception as e:
             logger.error(f"Failed to fetch alarms for device {terid}: {e}")
             return []
-    
+
+    def iter_recent_alarms(self, hours: int = 24, limit: int = 1000) -> Iterator[sqlite3.Row]:
+        """Yield recent alarms within specified hours without a result list"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            # Binding the offset keeps the SQL text constant, so the
+            # prepared statement is reused from the connection's cache
+            cursor.execute(_SELECT_ALARMS_RECENT_SQL, (f"-{hours} hours", limit))
+            yield from cursor
+
     def get_recent_alarms(self, hours: int = 24, limit: int = 1000) -> List[Dict[str, Any]]:
         """Get recent alarms within specified hours"""
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    """SELECT * FROM alarms 
-                       WHERE gps_time >= datetime('now', '-{} hours')
-                       ORDER BY gps_time DESC LIMIT ?""".format(hours),
-                    (limit,)
-                )
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+            return rows_to_dicts(self.iter_recent_alarms(hours, limit))
         except Exception as e:
             logger.error(f"Failed to fetch recent alarms: {e}")
             return []
@@ -489,19 +653,30 @@ class DatabaseManager:
         Clean up alarms older than specified days
         Returns number of records deleted
         """
+        deleted_count = 0
+        cutoff = f"-{days_to_keep} days"
         try:
-            with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "DELETE FROM alarms WHERE created_at < datetime('now', '-{} days')".format(days_to_keep)
-                )
-                deleted_count = cursor.rowcount
-                conn.commit()
-                logger.info(f"Cleaned up {deleted_count} old alarm records")
-                return deleted_count
+            # Delete in chunks, one transaction each, so other writers only
+            # ever wait for one chunk rather than the whole purge; the
+            # passive checkpoint between chunks keeps the WAL from growing.
+            # The checkpoint runs after the chunk commits (outside the
+            # _write_connection block) because it is a no-op while a
+            # transaction is open
+            while True:
+                with self._write_connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(_CLEANUP_CHUNK_SQL, (cutoff, _CLEANUP_CHUNK_SIZE))
+                    deleted = cursor.rowcount
+                if deleted <= 0:
+                    break
+                deleted_count += deleted
+                with self._write_lock:
+                    self._write_conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+            logger.info("Cleaned up %d old alarm records", deleted_count)
+            return deleted_count
         except Exception as e:
             logger.error(f"Failed to cleanup old alarms: {e}")
-            return 0
+            return deleted_count
     
     def get_alarm_by_id(self, alarm_id: int) -> Optional[Dict[str, Any]]:
         """Get a specific alarm by ID"""
@@ -514,42 +689,86 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"Failed to fetch alarm {alarm_id}: {e}")
             return None
-    
-    def get_alarms_by_date_range(self, start_date: str, end_date: str, limit: int = 1000,
-                                alarm_types: Optional[List[int]] = None, 
-                                device_id: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get alarms within a date range with optional filtering"""
+
+    def get_alarms_by_ids(self, alarm_ids: List[int]) -> List[Dict[str, Any]]:
+        """Get several alarms in one query instead of one lookup per id
+
+        Batch counterpart of get_alarm_by_id for burst consumers (popup
+        fans, bulk detail fetches); rows come back in id order, missing
+        ids are simply absent.
+        """
+        if not alarm_ids:
+            return []
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                
-                query = """
-                SELECT * FROM alarms 
-                WHERE gps_time >= ? AND gps_time <= ?
-                """
-                params = [start_date, end_date]
-                
-                # Add alarm type filter
-                if alarm_types:
-                    placeholders = ','.join(['?' for _ in alarm_types])
-                    query += f" AND alarm_type IN ({placeholders})"
-                    params.extend(alarm_types)
-                
-                # Add device filter
-                if device_id:
-                    query += " AND terid = ?"
-                    params.append(device_id)
-                
-                query += " ORDER BY gps_time DESC LIMIT ?"
-                params.append(limit)
-                
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
-                
+                placeholders = ','.join(['?' for _ in alarm_ids])
+                cursor.execute(
+                    f"SELECT * FROM alarms WHERE id IN ({placeholders}) ORDER BY id",
+                    alarm_ids
+                )
+                return rows_to_dicts(cursor)
+        except Exception as e:
+            logger.error(f"Failed to fetch alarms by ids: {e}")
+            return []
+
+    def get_alarms_by_date_range(self, start_date: str, end_date: str, limit: int = 1000,
+                                alarm_types: Optional[List[int]] = None,
+                                device_id: Optional[str] = None,
+                                require_valid_gps: bool = False) -> List[Dict[str, Any]]:
+        """Get alarms within a date range with optional filtering"""
+        try:
+            return rows_to_dicts(self.iter_alarms_by_date_range(
+                start_date, end_date, limit, alarm_types, device_id,
+                require_valid_gps))
         except Exception as e:
             logger.error(f"Failed to fetch alarms by date range: {e}")
             return []
+
+    def iter_alarms_by_date_range(self, start_date: str, end_date: str, limit: int = 1000,
+                                  alarm_types: Optional[List[int]] = None,
+                                  device_id: Optional[str] = None,
+                                  require_valid_gps: bool = False) -> Iterator[sqlite3.Row]:
+        """Yield alarms within a date range without a result list
+
+        gps_time is ISO-8601 text, so the lexicographic range compare is
+        also a temporal one and the gps_time/type indexes turn this into
+        a range scan; callers must pass dates in the same format.
+
+        require_valid_gps drops rows with NULL, zero or out-of-range
+        coordinates inside SQLite, so callers that only plot points never
+        pay to materialize rows they would discard anyway.
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+
+            query = """
+            SELECT * FROM alarms
+            WHERE gps_time >= ? AND gps_time <= ?
+            """
+            params = [start_date, end_date]
+
+            if require_valid_gps:
+                query += """ AND gps_lat IS NOT NULL AND gps_lng IS NOT NULL
+                AND NOT (gps_lat = 0 AND gps_lng = 0)
+                AND gps_lat BETWEEN -90 AND 90 AND gps_lng BETWEEN -180 AND 180"""
+
+            # Add alarm type filter
+            if alarm_types:
+                placeholders = ','.join(['?' for _ in alarm_types])
+                query += f" AND alarm_type IN ({placeholders})"
+                params.extend(alarm_types)
+
+            # Add device filter
+            if device_id:
+                query += " AND terid = ?"
+                params.append(device_id)
+
+            query += " ORDER BY gps_time DESC LIMIT ?"
+            params.append(limit)
+
+            cursor.execute(query, params)
+            yield from cursor
     
     def get_distinct_alarm_types(self) -> List[Dict[str, Any]]:
         """Get distinct alarm types from the database"""
@@ -565,48 +784,13 @@ class DatabaseManager:
                 """)
                 rows = cursor.fetchall()
                 
-                # Map alarm types to descriptions based on API documentation Appendix 2
-                alarm_type_names = {
-                    1: "Video Loss", 2: "Motion Detection", 3: "Blind Detection", 4: "HDD/SD Error",
-                    5: "IO 1", 6: "IO 2", 7: "IO 3", 8: "IO 4", 9: "IO 5", 10: "IO 6", 11: "IO 7", 12: "IO 8",
-                    13: "Panic Button", 14: "Low Speed", 15: "High Speed", 16: "Low Voltage", 17: "G-Force",
-                    18: "Geo-Fence", 19: "Unauthorised Ignition", 20: "Unauthorised Shutdown", 21: "GPS Fail",
-                    22: "GPS Antenna Short", 23: "GPS Antenna Open", 24: "Overspeed", 25: "Idle Time",
-                    26: "Harsh Acceleration", 27: "Harsh Cornering", 28: "Harsh Braking", 29: "Temperature Alarm",
-                    30: "Fuel Alarm", 31: "Fuel Theft", 32: "Fuel Fill", 33: "Power Disconnected", 34: "Power Connected",
-                    35: "Battery Low", 36: "Impact Alarm", 37: "SOS", 38: "Man Down", 39: "External Device Alarm",
-                    40: "External Power On", 41: "External Power Off", 42: "System Power On", 43: "System Power Off",
-                    44: "White List", 45: "Black List", 46: "RFID Card", 47: "Temperature Error",
-                    48: "Acceleration Sensor Error", 49: "TTS Error", 50: "Camera Error", 51: "Voltage Error",
-                    52: "Speed Limit", 53: "Route Deviation", 54: "Enter Area", 55: "Exit Area", 56: "Road Limit",
-                    57: "Dangerous Driving", 58: "Driver Fatigue", 59: "No Driver", 60: "Phone Detection",
-                    61: "Smoking Detection", 62: "Driver Distraction", 63: "Lane Departure", 64: "Forward Collision Warning",
-                    65: "Pedestrian Collision Warning", 66: "Blind Spot", 67: "Driver Change", 68: "Abnormal Fuel Consumption",
-                    69: "VSS Speed", 70: "Oil Pressure", 71: "Water Temperature", 72: "Neutral Safety Switch",
-                    73: "Handbrake", 74: "Door Open", 75: "Seat Belt", 76: "Key Switch", 77: "Reverse Gear",
-                    78: "Left Turn", 79: "Right Turn", 80: "Work Light", 81: "Retarder", 82: "Air Pressure",
-                    83: "Engine Error", 84: "Auxiliary Battery", 85: "Emergency Button", 86: "Loading",
-                    87: "Unloading", 88: "Driving Without License", 89: "Cumulative Driving Time", 90: "Road Maintenance",
-                    91: "Fatigue Driving", 92: "Overtime Parking", 93: "Route Change", 94: "VSS Failure",
-                    95: "Oil Shortage", 96: "Vehicle Theft", 97: "Illegal Ignition", 98: "Illegal Displacement",
-                    99: "Collision Rollover", 100: "Side Rollover", 134: "Picture Upload", 135: "Video Upload",
-                    136: "IC Card", 137: "Fingerprint", 138: "Retina", 139: "Face Recognition", 140: "Voice",
-                    141: "Weight", 142: "Trailer Connection", 143: "Trailer Disconnection", 144: "Passenger Up",
-                    145: "Passenger Down", 146: "School Bus", 147: "Emergency Evacuation", 148: "Anti-Theft",
-                    149: "Refueling", 150: "Driver Hours", 151: "Custom Alarm", 152: "Maintenance",
-                    153: "Diagnostic", 154: "Eco Driving", 155: "Green Band", 156: "Cruise Control",
-                    157: "Lane Change", 158: "Tailgating", 159: "Cornering", 160: "Acceleration",
-                    161: "Deceleration", 162: "Following Distance Monitoring", 163: "Speeding", 164: "Yawning Detection",
-                    165: "Eyes Closed", 166: "Looking Away", 167: "Head Down", 168: "Using Phone"
-                }
-                
                 result = []
                 for row in rows:
                     alarm_type = row[0]
                     count = row[1]
                     result.append({
                         'type': alarm_type,
-                        'name': alarm_type_names.get(alarm_type, f"Unknown ({alarm_type})"),
+                        'name': ALARM_TYPE_NAMES.get(alarm_type, f"Unknown ({alarm_type})"),
                         'count': count
                     })
                 
@@ -624,24 +808,14 @@ class DatabaseManager:
                       address: Optional[str] = None) -> bool:
         """
         Store GPS tracking data for a device.
-        Uses REPLACE to update existing record for the device.
+        Upserts so the existing row for the device is updated in place.
         
         Returns True if successful, False otherwise
         """
         try:
-            with self._get_connection() as conn:
+            with self._write_connection() as conn:
                 cursor = conn.cursor()
-                
-                # Use REPLACE to insert or update based on unique constraint
-                sql = """
-                    REPLACE INTO gps (
-                        terid, car_license, gps_time, latitude, longitude,
-                        altitude, speed, recordspeed, direction, state, address,
-                        last_updated
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """
-                
-                cursor.execute(sql, (
+                cursor.execute(_GPS_UPSERT_SQL, (
                     terid,
                     car_license,
                     gps_time,
@@ -654,27 +828,103 @@ class DatabaseManager:
                     state,
                     address
                 ))
-                
-                conn.commit()
-                logger.debug(f"Stored GPS data for device {terid}")
+                logger.debug("Stored GPS data for device %s", terid)
                 return True
-                
+
         except Exception as e:
             logger.error(f"Failed to store GPS data: {e}")
             return False
-    
-    def get_all_gps_positions(self) -> List[Dict[str, Any]]:
+
+    def store_gps_data_batch(self, rows: List[tuple]) -> int:
+        """
+        Store many GPS positions in one transaction.
+        Rows match _GPS_UPSERT_SQL: (terid, car_license, gps_time,
+        latitude, longitude, altitude, speed, recordspeed, direction,
+        state, address).
+
+        Returns the number of rows stored (0 on failure)
+        """
+        if not rows:
+            return 0
+        try:
+            with self._write_connection() as conn:
+                # Take the write lock up front rather than on the first row
+                conn.execute("BEGIN IMMEDIATE")
+                cursor = conn.cursor()
+                # Multi-row VALUES in chunks of _GPS_BATCH_CHUNK: fewer
+                # prepare/step cycles than one statement per row
+                for start in range(0, len(rows), _GPS_BATCH_CHUNK):
+                    chunk = rows[start:start + _GPS_BATCH_CHUNK]
+                    if len(chunk) == _GPS_BATCH_CHUNK:
+                        sql = _GPS_UPSERT_FULL_CHUNK_SQL
+                    else:
+                        sql = _gps_upsert_multirow(len(chunk))
+                    params = [value for row in chunk for value in row]
+                    cursor.execute(sql, params)
+                logger.debug("Stored GPS data for %d devices", len(rows))
+                return len(rows)
+        except Exception as e:
+            logger.error(f"Failed to store GPS batch: {e}")
+            return 0
+
+    def iter_all_gps_positions(self, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield the latest GPS position per device without a result list
+
+        Only one row dict is alive at a time, so the web layer can stream
+        large fleets straight into JSON. The column tuple is captured once
+        and zipped per row, which is cheaper than dict(sqlite3.Row).
+
+        limit caps the result to the most recently updated devices; the
+        ORDER BY walks idx_gps_last_updated in reverse, so a limited read
+        touches only the first rows of the index instead of the whole table.
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            if limit is not None:
+                cursor.execute(f"{_GPS_POSITIONS_SQL} LIMIT ?", (limit,))
+            else:
+                cursor.execute(_GPS_POSITIONS_SQL)
+            columns = tuple(d[0] for d in cursor.description)
+            for row in cursor:
+                yield dict(zip(columns, row))
+
+    def get_all_gps_positions(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Get the latest GPS positions for all devices
-        
+
         Returns list of GPS position data
         """
+        try:
+            return list(self.iter_all_gps_positions(limit=limit))
+        except Exception as e:
+            logger.error(f"Failed to fetch GPS positions: {e}")
+            return []
+    
+    def get_gps_count(self) -> int:
+        """Get total number of stored GPS positions (one row per device)"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*) FROM gps")
+                return cursor.fetchone()[0]
+        except Exception as e:
+            logger.error(f"Failed to get GPS count: {e}")
+            return 0
+
+    def get_gps_in_bbox(self, min_lat: float, max_lat: float,
+                        min_lng: float, max_lng: float) -> List[Dict[str, Any]]:
+        """
+        Get the latest GPS positions inside a bounding box (map viewport)
+
+        The BETWEEN range filters run off idx_gps_latlng, so a zoomed-in
+        viewport reads only the rows it shows rather than the whole table
+        """
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                
+
                 sql = """
-                    SELECT 
+                    SELECT
                         g.id, g.terid, g.car_license, g.gps_time,
                         g.latitude, g.longitude, g.altitude, g.speed,
                         g.recordspeed, g.direction, g.state, g.address,
@@ -682,22 +932,18 @@ class DatabaseManager:
                         d.company_name, d.company_branch
                     FROM gps g
                     LEFT JOIN devices d ON g.terid = d.terid
+                    WHERE g.latitude BETWEEN ? AND ?
+                      AND g.longitude BETWEEN ? AND ?
                     ORDER BY g.last_updated DESC
                 """
-                
-                cursor.execute(sql)
-                rows = cursor.fetchall()
-                
-                result = []
-                for row in rows:
-                    result.append(dict(row))
-                
-                return result
-                
+
+                cursor.execute(sql, (min_lat, max_lat, min_lng, max_lng))
+                return rows_to_dicts(cursor.fetchall())
+
         except Exception as e:
-            logger.error(f"Failed to fetch GPS positions: {e}")
+            logger.error(f"Failed to fetch GPS positions in bbox: {e}")
             return []
-    
+
     def get_gps_by_terid(self, terid: str) -> Optional[Dict[str, Any]]:
         """
         Get GPS position for a specific device
@@ -50,12 +50,23 @@ CREATE TABLE IF NOT EXISTS alarms (
 );
 
 -- Indexes for alarms table
-CREATE INDEX IF NOT EXISTS idx_alarms_terid ON alarms(terid);
 CREATE INDEX IF NOT EXISTS idx_alarms_gps_time ON alarms(gps_time);
-CREATE INDEX IF NOT EXISTS idx_alarms_alarm_type ON alarms(alarm_type);
 CREATE INDEX IF NOT EXISTS idx_alarms_last_updated ON alarms(last_updated);
 CREATE INDEX IF NOT EXISTS idx_alarms_created_at ON alarms(created_at);
 
+-- Composite indexes matching the hot query shapes: per-device alarm history
+-- ordered by recency, type-filtered time-range queries, and the heatmap
+-- endpoint's time-range + terid/type filters ordered by recency
+CREATE INDEX IF NOT EXISTS idx_alarms_terid_created ON alarms(terid, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_alarms_type_gps ON alarms(alarm_type, gps_time DESC);
+CREATE INDEX IF NOT EXISTS idx_alarms_gps_terid_type ON alarms(gps_time DESC, terid, alarm_type);
+
+-- The single-column terid/alarm_type indexes are prefixes of the composite
+-- indexes above; keeping them only tempts the planner into picking the
+-- narrower index and doubles the write cost per alarm
+DROP INDEX IF EXISTS idx_alarms_terid;
+DROP INDEX IF EXISTS idx_alarms_alarm_type;
+
 -- Unique constraint to prevent duplicate alarms
 -- Same device, GPS time, alarm type, and server time should not be duplicated
 CREATE UNIQUE INDEX IF NOT EXISTS idx_alarms_unique ON alarms(terid, gps_time, alarm_type, server_time);
@@ -85,4 +96,11 @@ CREATE INDEX IF NOT EXISTS idx_gps_last_updated ON gps(last_updated);
 CREATE INDEX IF NOT EXISTS idx_gps_gps_time ON gps(gps_time);
 
 -- Unique constraint to store only the latest GPS position per device
-CREATE UNIQUE INDEX IF NOT EXISTS idx_gps_unique ON gps(terid);
\ No newline at end of file
+CREATE UNIQUE INDEX IF NOT EXISTS idx_gps_unique ON gps(terid);
+
+-- Composite index so map-viewport (bounding box) queries range-scan on
+-- latitude instead of reading the whole table
+CREATE INDEX IF NOT EXISTS idx_gps_latlng ON gps(latitude, longitude);
+-- Schema version stamp; must match _SCHEMA_VERSION in database.py.
+-- Bump both whenever this file changes so existing databases re-run the DDL.
+PRAGMA user_version = 4;
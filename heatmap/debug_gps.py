@@ -3,11 +3,26 @@
 Debug script to check GPS tracking data flow
 """
 import logging
+
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 from logging_config import setup_logging
 from database import DatabaseManager
 from api_client import BrigadeAPIClient
 from gps_tracking_service import GPSTrackingService
 
+# Pooled HTTP session with retries for probing the local web server: the
+# server may still be coming up when the first probe fires, and reusing one
+# TCP connection beats re-handshaking per request
+_SESSION = requests.Session()
+_SESSION.mount('http://', HTTPAdapter(
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+))
+
 def check_database_gps():
     """Check what GPS data is in the database"""
     print("🔍 Checking GPS data in database...")
@@ -134,10 +149,9 @@ def check_gps_api_endpoint():
     """Test the web API endpoint"""
     print("🔍 Testing GPS API endpoint...")
     try:
-        import requests
         import time
         import threading
-        
+
         # Start web server in background
         def start_server():
             from web_server import AlarmHeatmapServer
@@ -148,10 +162,11 @@ def check_gps_api_endpoint():
         server_thread.start()
         time.sleep(3)
         
-        response = requests.get('http://127.0.0.1:5003/api/gps/positions', timeout=10)
-        
+        response = _SESSION.get('http://127.0.0.1:5003/api/gps/positions', timeout=10)
+
         if response.status_code == 200:
-            data = response.json()
+            # orjson parses the raw bytes directly, same as the API client
+            data = orjson.loads(response.content)
             if data.get('success'):
                 positions = data.get('positions', [])
                 print(f"  ✅ API returned {len(positions)} GPS positions")
@@ -15,25 +15,28 @@ logger = logging.getLogger(__name__)
 class DeviceSyncService:
     """Service to synchronize device data from API to database"""
     
-    def __init__(self):
-        self.api_client = BrigadeAPIClient()
-        self.db_manager = DatabaseManager()
+    def __init__(self, api_client: Optional[BrigadeAPIClient] = None,
+                 db_manager: Optional[DatabaseManager] = None):
+        # Accept shared instances so services can reuse one API session and
+        # one database manager instead of each building their own
+        self.api_client = api_client or BrigadeAPIClient()
+        self.db_manager = db_manager or DatabaseManager()
         self._sync_lock = Lock()
         self._last_sync_time: Optional[datetime] = None
-        self._sync_in_progress = False
-    
+
     def sync_devices(self) -> bool:
         """
         Synchronize devices from API to database
         Returns True if successful, False otherwise
         """
-        if self._sync_in_progress:
+        # Try-lock instead of a separate flag plus blocking acquire: the flag
+        # check and lock acquisition were racy, and a blocked caller would
+        # pointlessly re-run the sync as soon as the current one finished
+        if not self._sync_lock.acquire(blocking=False):
             logger.warning("Sync already in progress, skipping...")
             return False
-        
-        with self._sync_lock:
-            self._sync_in_progress = True
-            
+
+        try:
             try:
                 logger.info("Starting device synchronization...")
                 start_time = time.time()
@@ -69,20 +72,20 @@ class DeviceSyncService:
             except Exception as e:
                 logger.error(f"Unexpected error during device sync: {e}")
                 return False
-            
-            finally:
-                self._sync_in_progress = False
-    
+        finally:
+            self._sync_lock.release()
+
     def get_sync_status(self) -> dict:
         """Get current sync status information"""
-        device_count = self.db_manager.get_device_count()
-        last_db_update = self.db_manager.get_last_update_time()
-        
+        # One combined (and briefly cached) query for the count and the
+        # last-update timestamp instead of two separate round trips
+        stats = self.db_manager.get_stats()
+
         return {
             'last_sync_time': self._last_sync_time.isoformat() if self._last_sync_time else None,
-            'sync_in_progress': self._sync_in_progress,
-            'total_devices': device_count,
-            'last_db_update': last_db_update
+            'sync_in_progress': self._sync_lock.locked(),
+            'total_devices': stats['device_count'],
+            'last_db_update': stats['last_device_update']
         }
     
     def force_sync(self) -> bool:
@@ -16,10 +16,18 @@ logger = logging.getLogger(__name__)
 class GPSTrackingService:
     """Service to fetch and store GPS tracking data"""
     
-    def __init__(self):
-        self.api_client = BrigadeAPIClient()
-        self.db_manager = DatabaseManager()
-        
+    def __init__(self, api_client: Optional[BrigadeAPIClient] = None,
+                 db_manager: Optional[DatabaseManager] = None):
+        # Accept shared instances so services can reuse one API session and
+        # one database manager instead of each building their own
+        self.api_client = api_client or BrigadeAPIClient()
+        self.db_manager = db_manager or DatabaseManager()
+        # Hash of the last row stored per terid so unchanged points (parked
+        # or powered-off vehicles) skip the write entirely. Rebuilt on the
+        # first tick after a restart, so the worst case is one redundant
+        # write per device
+        self._last_point_hash: Dict[str, int] = {}
+
     def sync_gps_data(self) -> bool:
         """Fetch latest GPS positions for all devices and store in database"""
         try:
@@ -31,87 +39,105 @@ class GPSTrackingService:
             
             # Extract device IDs (terids)
             device_ids = [device['terid'] for device in devices]
-            logger.info(f"Fetching GPS data for {len(device_ids)} devices")
+            logger.info("Fetching GPS data for %d devices", len(device_ids))
             
-            # Get last GPS positions from API
+            # Get last GPS positions from API. The endpoint accepts the
+            # whole terid list in one request, so the fetch is a single
+            # round trip — no per-device fan-out to parallelize here
             gps_data = self.api_client.get_last_gps_positions(device_ids)
             if not gps_data:
                 logger.warning("No GPS data received from API")
                 return False
             
-            # Store GPS data in database
-            success_count = 0
-            for gps_point in gps_data:
-                if self._store_gps_data(gps_point):
-                    success_count += 1
-            
-            logger.info(f"Successfully stored GPS data for {success_count}/{len(gps_data)} devices")
-            return success_count > 0
+            # The device list is already in hand, so build the terid ->
+            # car_license map from it instead of one SELECT per GPS point.
+            # Rebuilding per sync also makes staleness a non-issue: the map
+            # can never outlive the device snapshot this tick is based on
+            license_map = {device['terid']: device['car_license'] for device in devices}
+
+            # Validate every point first, then store the whole batch in one
+            # transaction instead of a connection/commit per device. The
+            # bound method and comprehension keep the per-point interpreter
+            # overhead to the validation itself
+            build_row = self._build_gps_row
+            candidates = (build_row(gps_point, license_map) for gps_point in gps_data)
+            rows = [row for row in candidates if row is not None]
+
+            # Drop rows identical to what was last stored for the device:
+            # a stationary vehicle reporting the same point every tick
+            # would otherwise churn the indexes and WAL for nothing
+            last_hashes = self._last_point_hash
+            changed = [(row, hash(row)) for row in rows
+                       if last_hashes.get(row[0]) != hash(row)]
+            unchanged = len(rows) - len(changed)
+
+            success_count = self.db_manager.store_gps_data_batch([row for row, _ in changed])
+            if success_count:
+                # Only remember hashes for rows that actually landed
+                for row, row_hash in changed:
+                    last_hashes[row[0]] = row_hash
+
+            logger.info("Successfully stored GPS data for %d/%d devices (%d unchanged, skipped)",
+                        success_count, len(gps_data), unchanged)
+            return success_count > 0 or unchanged > 0
             
         except Exception as e:
             logger.error(f"Error syncing GPS data: {e}")
             return False
     
-    def _store_gps_data(self, gps_point: Dict[str, Any]) -> bool:
-        """Store single GPS data point in database"""
+    def _build_gps_row(self, gps_point: Dict[str, Any],
+                       license_map: Dict[str, Any]) -> Optional[tuple]:
+        """Validate one GPS point and return its store_gps_data_batch row
+
+        Returns None when the point should be skipped.
+        """
         try:
             # Extract and validate GPS data
             terid = gps_point.get('terid')
             if not terid:
-                logger.warning(f"Missing terid in GPS data: {gps_point}")
-                return False
-            
-            # Get device info for car_license
-            device = self.db_manager.get_device_by_terid(terid)
-            car_license = device['car_license'] if device else None
-            
+                logger.warning("Missing terid in GPS data: %s", gps_point)
+                return None
+
+            car_license = license_map.get(terid)
+
             # Parse GPS coordinates
             try:
                 latitude = float(gps_point.get('gpslat', 0))
                 longitude = float(gps_point.get('gpslng', 0))
-                
+
                 # Skip invalid coordinates
                 if latitude == 0 and longitude == 0:
-                    logger.debug(f"Skipping GPS data with zero coordinates for {terid}")
-                    return False
-                    
+                    logger.debug("Skipping GPS data with zero coordinates for %s", terid)
+                    return None
+
                 if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
-                    logger.warning(f"Invalid GPS coordinates for {terid}: lat={latitude}, lng={longitude}")
-                    return False
-                    
+                    logger.warning("Invalid GPS coordinates for %s: lat=%s, lng=%s", terid, latitude, longitude)
+                    return None
+
             except (ValueError, TypeError):
-                logger.warning(f"Invalid GPS coordinates for {terid}")
-                return False
-            
-            # Parse other fields
-            altitude = self._safe_int(gps_point.get('altitude'))
-            speed = self._safe_int(gps_point.get('speed'))
-            recordspeed = self._safe_int(gps_point.get('recordspeed'))
-            direction = self._safe_int(gps_point.get('direction'))
-            state = self._safe_int(gps_point.get('state'))
-            
-            # Parse timestamps
+                logger.warning("Invalid GPS coordinates for %s", terid)
+                return None
+
+            # Parse timestamps; other fields are safe int conversions
             gps_time = self._parse_timestamp(gps_point.get('gpstime'))
-            
-            # Store in database (will update if exists due to unique constraint)
-            self.db_manager.store_gps_data(
-                terid=terid,
-                car_license=car_license,
-                gps_time=gps_time,
-                latitude=latitude,
-                longitude=longitude,
-                altitude=altitude,
-                speed=speed,
-                recordspeed=recordspeed,
-                direction=direction,
-                state=state
+
+            return (
+                terid,
+                car_license,
+                gps_time,
+                latitude,
+                longitude,
+                self._safe_int(gps_point.get('altitude')),
+                self._safe_int(gps_point.get('speed')),
+                self._safe_int(gps_point.get('recordspeed')),
+                self._safe_int(gps_point.get('direction')),
+                self._safe_int(gps_point.get('state')),
+                None  # address
             )
-            
-            return True
-            
+
         except Exception as e:
-            logger.error(f"Error storing GPS data: {e}")
-            return False
+            logger.error(f"Error validating GPS data: {e}")
+            return None
     
     def _safe_int(self, value: Any) -> Optional[int]:
         """Safely convert value to integer"""
@@ -128,30 +154,53 @@ class GPSTrackingService:
             return None
         
         try:
-            # Expected format: "2017-06-19 00:00:00"
+            # Expected format: "2017-06-19 00:00:00". The format is fixed,
+            # so slice the fields directly instead of strptime, which
+            # re-interprets the format string on every call
+            if len(timestamp_str) == 19:
+                return datetime(
+                    int(timestamp_str[0:4]), int(timestamp_str[5:7]),
+                    int(timestamp_str[8:10]), int(timestamp_str[11:13]),
+                    int(timestamp_str[14:16]), int(timestamp_str[17:19])
+                )
             return datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
         except ValueError:
-            logger.warning(f"Invalid timestamp format: {timestamp_str}")
+            logger.warning("Invalid timestamp format: %s", timestamp_str)
             return None
     
     def run_continuous(self, interval_seconds: int = 30):
         """Run GPS sync continuously with specified interval"""
         logger.info(f"Starting continuous GPS tracking (interval: {interval_seconds}s)")
-        
+
+        # Monotonic deadlines instead of sleep(interval) after each sync:
+        # the old shape made the real period interval + sync duration, so
+        # the cadence drifted by however long each sync took. If a sync
+        # overruns the interval, skip the missed ticks rather than firing
+        # a burst of catch-up syncs
+        next_tick = time.monotonic()
         while True:
             try:
                 logger.info("Starting GPS data sync...")
                 self.sync_gps_data()
-                
-                logger.info(f"GPS sync completed. Sleeping for {interval_seconds} seconds...")
-                time.sleep(interval_seconds)
-                
+
+                next_tick += interval_seconds
+                now = time.monotonic()
+                if next_tick <= now:
+                    missed = int((now - next_tick) // interval_seconds) + 1
+                    logger.warning("GPS sync overran its %ds interval; skipping %d tick(s)",
+                                   interval_seconds, missed)
+                    next_tick += missed * interval_seconds
+                logger.info("GPS sync completed. Next sync in %.1f seconds...",
+                            next_tick - now)
+                time.sleep(max(0.0, next_tick - time.monotonic()))
+
             except KeyboardInterrupt:
                 logger.info("GPS tracking service stopped by user")
                 break
             except Exception as e:
                 logger.error(f"Unexpected error in GPS tracking loop: {e}")
                 logger.info(f"Retrying in {interval_seconds} seconds...")
+                next_tick = time.monotonic() + interval_seconds
                 time.sleep(interval_seconds)
 
 def main():
@@ -3,14 +3,18 @@ Main application for Brigade Electronics device and alarm synchronization
 """
 import sys
 import signal
+import threading
 import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from logging_config import setup_logging, get_logger
 from scheduler import DeviceSyncScheduler
 from alarm_scheduler import AlarmSyncScheduler
 from device_sync_service import DeviceSyncService
 from alarm_sync_service import AlarmSyncService
+from api_client import BrigadeAPIClient
+from database import DatabaseManager
 
 logger = get_logger(__name__)
 
@@ -21,37 +25,68 @@ class BrigadeElectronicsApp:
         self.device_scheduler: Optional[DeviceSyncScheduler] = None
         self.alarm_scheduler: Optional[AlarmSyncScheduler] = None
         self._running = False
+        # Set by the signal handler; the main loop blocks on it instead of
+        # polling, so shutdown wakes the main thread immediately
+        self._stop_event = threading.Event()
+        # (timestamp, (device_status, alarm_status)); repeated status calls
+        # within a second share one snapshot instead of re-querying both
+        # schedulers
+        self._status_cache: tuple = (0.0, None)
+        self._status_lock = threading.Lock()
     
     def start(self) -> bool:
         """Start the application"""
         try:
             logger.info("Starting Brigade Electronics Device and Alarm Sync Service")
-            
+
+            # Take shutdown signals synchronously on a dedicated thread
+            # rather than via async handlers, which can fire mid-logging or
+            # mid-commit and deadlock on re-entered locks. Masking happens
+            # before any other thread is spawned so every child inherits the
+            # mask and only the sigwait thread ever sees the signal
+            signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGINT, signal.SIGTERM})
+            threading.Thread(target=self._sigwait_loop, name='sigwait', daemon=True).start()
+
+            # Share one API client and database manager across both schedulers
+            # so they reuse a single auth key and HTTP connection pool
+            api_client = BrigadeAPIClient()
+            db_manager = DatabaseManager()
+
             # Initialize schedulers
-            self.device_scheduler = DeviceSyncScheduler()
-            self.alarm_scheduler = AlarmSyncScheduler()
-            
-            # Start device scheduler
-            if not self.device_scheduler.start():
-                logger.error("Failed to start device scheduler")
-                return False
+            self.device_scheduler = DeviceSyncScheduler(
+                sync_service=DeviceSyncService(api_client=api_client, db_manager=db_manager)
+            )
+            self.alarm_scheduler = AlarmSyncScheduler(
+                alarm_sync_service=AlarmSyncService(api_client=api_client, db_manager=db_manager)
+            )
             
-            # Start alarm scheduler
-            if not self.alarm_scheduler.start():
-                logger.error("Failed to start alarm scheduler")
-                # Stop device scheduler if alarm scheduler fails
-                self.device_scheduler.stop()
+            # Start both schedulers in parallel; each start() submits its
+            # loop to the shared pool and returns, so this mostly overlaps
+            # their setup rather than waiting on one before the other
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                device_future = executor.submit(self.device_scheduler.start)
+                alarm_future = executor.submit(self.alarm_scheduler.start)
+                device_started = device_future.result()
+                alarm_started = alarm_future.result()
+
+            if not (device_started and alarm_started):
+                if not device_started:
+                    logger.error("Failed to start device scheduler")
+                if not alarm_started:
+                    logger.error("Failed to start alarm scheduler")
+                # Roll back whichever one did start so a half-started app
+                # doesn't keep syncing in the background
+                if device_started:
+                    self.device_scheduler.stop()
+                if alarm_started:
+                    self.alarm_scheduler.stop()
                 return False
             
             self._running = True
             logger.info("Brigade Electronics Sync Service started successfully")
             logger.info("- Device sync: every 10 minutes")
             logger.info("- Alarm sync: every 5 minutes")
-            
-            # Setup signal handlers for graceful shutdown
-            signal.signal(signal.SIGINT, self._signal_handler)
-            signal.signal(signal.SIGTERM, self._signal_handler)
-            
+
             return True
             
         except Exception as e:
@@ -65,6 +100,8 @@ class BrigadeElectronicsApp:
         
         logger.info("Stopping Brigade Electronics Sync Service...")
         self._running = False
+        # Wake the main loop if it is blocked on the event
+        self._stop_event.set()
         
         # Stop both schedulers
         if self.device_scheduler:
@@ -75,10 +112,11 @@ class BrigadeElectronicsApp:
         
         logger.info("Brigade Electronics Sync Service stopped")
     
-    def _signal_handler(self, signum, frame):
-        """Handle shutdown signals"""
-        logger.info(f"Received signal {signum}, shutting down gracefully...")
-        self.stop()
+    def _sigwait_loop(self):
+        """Block until SIGINT/SIGTERM arrives, then request shutdown"""
+        sig = signal.sigwait({signal.SIGINT, signal.SIGTERM})
+        logger.info("Received signal %d, shutting down gracefully...", sig)
+        self._stop_event.set()
     
     def run(self):
         """Run the application"""
@@ -87,15 +125,20 @@ class BrigadeElectronicsApp:
             return 1
         
         try:
-            # Keep the main thread alive
-            while self._running:
-                time.sleep(5)
-                
-                # Check if schedulers are still running
+            # Block on the stop event rather than a sleep poll: the signal
+            # handler wakes the wait immediately, and between wakes the main
+            # thread sits in a single blocked syscall. The timeout only
+            # paces the scheduler-liveness checks
+            while not self._stop_event.wait(timeout=30):
+                if not self._running:
+                    break
+
+                # Check if schedulers are still running; is_running() is a
+                # plain attribute read, so this costs nothing per wake
                 if self.device_scheduler and not self.device_scheduler.is_running():
                     logger.error("Device scheduler stopped unexpectedly")
                     break
-                
+
                 if self.alarm_scheduler and not self.alarm_scheduler.is_running():
                     logger.error("Alarm scheduler stopped unexpectedly")
                     break
@@ -109,40 +152,73 @@ class BrigadeElectronicsApp:
         
         return 0
     
+    def _get_statuses(self) -> tuple:
+        """Fetch both scheduler statuses, memoized for one second
+
+        The two get_status() calls each read DB counts, so they run in
+        parallel when the cache is stale and repeated callers (e.g. a
+        polling console) share the snapshot.
+        """
+        with self._status_lock:
+            cached_at, cached = self._status_cache
+            if cached is not None and time.monotonic() - cached_at < 1.0:
+                return cached
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                device_future = executor.submit(self.device_scheduler.get_status)
+                alarm_future = executor.submit(self.alarm_scheduler.get_status)
+                statuses = (device_future.result(), alarm_future.result())
+
+            self._status_cache = (time.monotonic(), statuses)
+            return statuses
+
+    @staticmethod
+    def _format_section(title: str, fields: list) -> list:
+        """Format one status section as a list of report lines"""
+        lines = [f"\n--- {title} ---"]
+        lines.extend(f"{label}: {value}" for label, value in fields)
+        return lines
+
     def status(self):
         """Show application status"""
         if not self.device_scheduler or not self.alarm_scheduler:
             print("Schedulers not initialized")
             return
-        
-        device_status = self.device_scheduler.get_status()
-        alarm_status = self.alarm_scheduler.get_status()
-        
-        print("\n=== Brigade Electronics Sync Service Status ===")
-        
-        # Device sync status
-        print("\n--- Device Sync Status ---")
-        print(f"Scheduler Running: {device_status['scheduler_running']}")
-        print(f"Update Interval: {device_status['update_interval_minutes']} minutes")
-        print(f"Next Run Time: {device_status['next_run_time']}")
-        print(f"Total Devices: {device_status['sync_status']['total_devices']}")
-        print(f"Last Sync Time: {device_status['sync_status']['last_sync_time']}")
-        print(f"Last DB Update: {device_status['sync_status']['last_db_update']}")
-        print(f"Sync In Progress: {device_status['sync_status']['sync_in_progress']}")
-        
-        # Alarm sync status
-        print("\n--- Alarm Sync Status ---")
-        print(f"Scheduler Running: {alarm_status['scheduler_running']}")
-        print(f"Update Interval: {alarm_status['update_interval_minutes']} minutes")
-        print(f"Next Run Time: {alarm_status['next_run_time']}")
-        print(f"Total Devices Monitored: {alarm_status['alarm_sync_status']['total_devices_monitored']}")
-        print(f"Total Alarms: {alarm_status['alarm_sync_status']['total_alarms']}")
-        print(f"Last Sync Time: {alarm_status['alarm_sync_status']['last_sync_time']}")
-        print(f"Last Alarm Update: {alarm_status['alarm_sync_status']['last_alarm_update']}")
-        print(f"Sync In Progress: {alarm_status['alarm_sync_status']['sync_in_progress']}")
-        print(f"Lookback Minutes: {alarm_status['alarm_sync_status']['lookback_minutes']}")
-        
-        print("=" * 55)
+
+        device_status, alarm_status = self._get_statuses()
+        print(self.format_status(device_status, alarm_status))
+
+    @classmethod
+    def format_status(cls, device_status: dict, alarm_status: dict) -> str:
+        """Format the two scheduler status dicts as one report string"""
+        device_sync = device_status['sync_status']
+        alarm_sync = alarm_status['alarm_sync_status']
+
+        # Build the whole report and print once instead of a write per line
+        parts = ["\n=== Brigade Electronics Sync Service Status ==="]
+        parts += cls._format_section("Device Sync Status", [
+            ("Scheduler Running", device_status['scheduler_running']),
+            ("Update Interval", f"{device_status['update_interval_minutes']} minutes"),
+            ("Next Run Time", device_status['next_run_time']),
+            ("Total Devices", device_sync['total_devices']),
+            ("Last Sync Time", device_sync['last_sync_time']),
+            ("Last DB Update", device_sync['last_db_update']),
+            ("Sync In Progress", device_sync['sync_in_progress']),
+        ])
+        parts += cls._format_section("Alarm Sync Status", [
+            ("Scheduler Running", alarm_status['scheduler_running']),
+            ("Update Interval", f"{alarm_status['update_interval_minutes']} minutes"),
+            ("Next Run Time", alarm_status['next_run_time']),
+            ("Total Devices Monitored", alarm_sync['total_devices_monitored']),
+            ("Total Alarms", alarm_sync['total_alarms']),
+            ("Last Sync Time", alarm_sync['last_sync_time']),
+            ("Last Alarm Update", alarm_sync['last_alarm_update']),
+            ("Sync In Progress", alarm_sync['sync_in_progress']),
+            ("Lookback Minutes", alarm_sync['lookback_minutes']),
+        ])
+        parts.append("=" * 55)
+
+        return "\n".join(parts)
     
     def force_sync(self, sync_type: str = 'both'):
         """Force an immediate sync"""
@@ -150,26 +226,27 @@ class BrigadeElectronicsApp:
             logger.error("Schedulers not initialized")
             return False
         
+        # Both syncs are HTTP-bound and independent, so run them on two
+        # threads: wall-clock becomes the slower of the two instead of
+        # their sum
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {}
+            if sync_type in ['both', 'devices']:
+                logger.info("Forcing immediate device sync...")
+                futures['device'] = executor.submit(self.device_scheduler.force_sync)
+            if sync_type in ['both', 'alarms']:
+                logger.info("Forcing immediate alarm sync...")
+                futures['alarm'] = executor.submit(self.alarm_scheduler.force_sync)
+            results = {name: future.result() for name, future in futures.items()}
+
         success = True
-        
-        if sync_type in ['both', 'devices']:
-            logger.info("Forcing immediate device sync...")
-            device_success = self.device_scheduler.force_sync()
-            if device_success:
-                logger.info("Force device sync completed successfully")
-            else:
-                logger.error("Force device sync failed")
-                success = False
-        
-        if sync_type in ['both', 'alarms']:
-            logger.info("Forcing immediate alarm sync...")
-            alarm_success = self.alarm_scheduler.force_sync()
-            if alarm_success:
-                logger.info("Force alarm sync completed successfully")
+        for name, sync_success in results.items():
+            if sync_success:
+                logger.info("Force %s sync completed successfully", name)
             else:
-                logger.error("Force alarm sync failed")
+                logger.error("Force %s sync failed", name)
                 success = False
-        
+
         return success
 
 def main():
@@ -208,38 +285,33 @@ def main():
             return app.run()
         
         elif args.command == 'status':
-            # Show status
-            app.device_scheduler = DeviceSyncScheduler()
-            app.alarm_scheduler = AlarmSyncScheduler()
-            app.status()
+            # Show status from read-only snapshots: no scheduler, sync
+            # service or API client is constructed just to be discarded
+            print(BrigadeElectronicsApp.format_status(
+                DeviceSyncScheduler.read_status_only(),
+                AlarmSyncScheduler.read_status_only()
+            ))
             return 0
         
         elif args.command == 'sync':
-            # Force sync
-            if args.sync_type in ['both', 'devices']:
-                sync_service = DeviceSyncService()
-                device_success = sync_service.sync_devices()
-                if device_success:
-                    logger.info("Manual device sync completed successfully")
-                else:
-                    logger.error("Manual device sync failed")
-            
-            if args.sync_type in ['both', 'alarms']:
-                alarm_service = AlarmSyncService()
-                alarm_success = alarm_service.sync_alarms()
-                if alarm_success:
-                    logger.info("Manual alarm sync completed successfully")
+            # Force sync; the two syncs are independent HTTP-bound work,
+            # so run them concurrently
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = {}
+                if args.sync_type in ['both', 'devices']:
+                    futures['device'] = executor.submit(DeviceSyncService().sync_devices)
+                if args.sync_type in ['both', 'alarms']:
+                    futures['alarm'] = executor.submit(AlarmSyncService().sync_alarms)
+                results = {name: future.result() for name, future in futures.items()}
+
+            for name, sync_success in results.items():
+                if sync_success:
+                    logger.info("Manual %s sync completed successfully", name)
                 else:
-                    logger.error("Manual alarm sync failed")
-            
+                    logger.error("Manual %s sync failed", name)
+
             # Return success if all requested syncs succeeded
-            overall_success = True
-            if args.sync_type in ['both', 'devices']:
-                overall_success = overall_success and device_success
-            if args.sync_type in ['both', 'alarms']:
-                overall_success = overall_success and alarm_success
-            
-            return 0 if overall_success else 1
+            return 0 if all(results.values()) else 1
         
     except Exception as e:
         logger.error(f"Application error: {e}")
@@ -4,6 +4,7 @@ Brigade Electronics Monitoring System
 Unified launcher for GPS tracking and web services
 """
 import os
+import sched
 import sys
 import time
 import signal
@@ -11,6 +12,12 @@ import argparse
 import threading
 import subprocess
 from logging_config import setup_logging
+from api_client import BrigadeAPIClient
+from database import DatabaseManager
+from gps_tracking_service import GPSTrackingService
+from device_sync_service import DeviceSyncService
+from alarm_sync_service import AlarmSyncService
+from web_server import AlarmHeatmapServer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -25,184 +32,204 @@ class BrigadeMonitoringSystem:
         self.debug = debug
         self.processes = []
         self.threads = []
+        # Single shutdown rendezvous: the sigwait thread sets it, the main
+        # thread and the scheduler's delay function block on it, so a
+        # shutdown is one futex wake away for every waiter — no timed
+        # polling and no need for a self-pipe/wakeup-fd scheme
         self.shutdown_event = threading.Event()
-        
-    def start_gps_tracking_service(self):
-        """Start GPS tracking service in a separate thread"""
-        def run_gps_service():
+        # One sched-based loop hosts every periodic sync instead of a
+        # dedicated sleeping thread per service; waiting on the shutdown
+        # event as the delay function makes shutdown interrupt a pending
+        # wait immediately (same shape as DeviceSyncScheduler)
+        self._sched = sched.scheduler(time.monotonic, self.shutdown_event.wait)
+        # Services are built once here and reused by every tick; each
+        # scheduler fire binds a warm instance instead of re-importing and
+        # re-constructing inside the job. All three share one API client
+        # (one auth key, one HTTP connection pool) and one database manager
+        # (one writer and read pool) instead of three of each, the same
+        # wiring main.py uses for its schedulers
+        api_client = BrigadeAPIClient()
+        db_manager = DatabaseManager()
+        self._gps_service = GPSTrackingService(api_client=api_client, db_manager=db_manager)
+        self._device_service = DeviceSyncService(api_client=api_client, db_manager=db_manager)
+        self._alarm_service = AlarmSyncService(api_client=api_client, db_manager=db_manager)
+
+    def _schedule_job(self, name, func, interval_seconds, deadline, backoff=None):
+        """Enter a periodic job into the shared scheduler
+
+        Each run re-enters itself at the previous deadline plus the
+        interval, so job duration does not drift the cadence. Failures
+        retry with capped exponential backoff (interval, 2x, 4x ... up to
+        10 minutes) instead of hammering a broken upstream at full rate;
+        the first success resets the cadence.
+        """
+        def tick():
+            if self.shutdown_event.is_set():
+                return
+            succeeded = False
             try:
-                from gps_tracking_service import GPSTrackingService
-                
-                logger.info("Starting GPS tracking service...")
-                service = GPSTrackingService()
-                
-                while not self.shutdown_event.is_set():
-                    try:
-                        logger.info("Syncing GPS data...")
-                        success = service.sync_gps_data()
-                        
-                        if success:
-                            logger.info("GPS sync completed successfully")
-                        else:
-                            logger.warning("GPS sync failed")
-                        
-                        # Wait for next interval or shutdown signal
-                        if self.shutdown_event.wait(timeout=self.gps_interval):
-                            break
-                            
-                    except Exception as e:
-                        logger.error(f"Error in GPS sync loop: {e}")
-                        if self.shutdown_event.wait(timeout=30):
-                            break
-                
-                logger.info("GPS tracking service stopped")
-                
+                # One info record per tick (the outcome); the start marker is
+                # debug-only so steady-state runs don't emit two records per
+                # job per interval
+                logger.debug("Running %s...", name)
+                succeeded = bool(func())
+                if succeeded:
+                    logger.info("%s completed successfully", name)
+                else:
+                    logger.warning("%s failed", name)
             except Exception as e:
-                logger.error(f"Failed to start GPS tracking service: {e}")
-        
-        gps_thread = threading.Thread(target=run_gps_service, daemon=True)
-        gps_thread.start()
-        self.threads.append(gps_thread)
-        
+                logger.error("Error in %s: %s", name, e)
+
+            # Re-enter only while still running: if shutdown fired during
+            # the sync its queue drain already happened, and a new event
+            # would make sched.run spin on the set shutdown event until the
+            # next deadline
+            if self.shutdown_event.is_set():
+                return
+            if succeeded:
+                self._schedule_job(name, func, interval_seconds,
+                                   deadline + interval_seconds)
+            else:
+                retry_in = backoff or interval_seconds
+                logger.info("%s retrying in %.0fs", name, retry_in)
+                self._schedule_job(name, func, interval_seconds,
+                                   time.monotonic() + retry_in,
+                                   backoff=min(retry_in * 2, 600))
+
+        self._sched.enterabs(deadline, 1, tick)
+
+    def start_sync_services(self):
+        """Run the GPS, device and alarm syncs on one scheduler thread"""
+        def run_scheduler():
+            try:
+                # Initial device sync first so the GPS and alarm jobs have
+                # a device roster to work with
+                logger.info("Performing initial device sync...")
+                try:
+                    self._device_service.sync_devices()
+                except Exception as e:
+                    logger.error("Error in initial device sync: %s", e)
+
+                now = time.monotonic()
+                self._schedule_job('GPS sync', self._gps_service.sync_gps_data,
+                                   self.gps_interval, now)
+                self._schedule_job('alarm sync', self._alarm_service.sync_alarms,
+                                   300, now)  # 5 minutes
+                self._schedule_job('device sync', self._device_service.sync_devices,
+                                   3600, now + 3600)  # hourly, first sync done above
+                self._sched.run()
+
+                logger.info("Sync scheduler stopped")
+
+            except Exception as e:
+                logger.error("Failed to start sync services: %s", e)
+
+        sched_thread = threading.Thread(target=run_scheduler, daemon=True,
+                                        name='sync-sched')
+        sched_thread.start()
+        self.threads.append(sched_thread)
+
     def start_web_server(self):
         """Start web server in a separate thread"""
         def run_web_server():
             try:
-                from web_server import AlarmHeatmapServer
-                
-                logger.info(f"Starting web server on {self.host}:{self.port}...")
+                logger.info("Starting web server on %s:%s...", self.host, self.port)
                 server = AlarmHeatmapServer(host=self.host, port=self.port, debug=self.debug)
                 server.run()
                 
             except Exception as e:
-                logger.error(f"Failed to start web server: {e}")
+                logger.error("Failed to start web server: %s", e)
         
         web_thread = threading.Thread(target=run_web_server, daemon=True)
         web_thread.start()
         self.threads.append(web_thread)
     
-    def start_device_sync_service(self):
-        """Start device synchronization service"""
-        def run_device_sync():
-            try:
-                from device_sync_service import DeviceSyncService
-                
-                logger.info("Starting device sync service...")
-                service = DeviceSyncService()
-                
-                # Initial sync
-                service.sync_devices()
-                
-                # Periodic sync every hour
-                while not self.shutdown_event.is_set():
-                    if self.shutdown_event.wait(timeout=3600):  # 1 hour
-                        break
-                    
-                    try:
-                        logger.info("Syncing devices...")
-                        service.sync_devices()
-                    except Exception as e:
-                        logger.error(f"Error in device sync: {e}")
-                
-                logger.info("Device sync service stopped")
-                
-            except Exception as e:
-                logger.error(f"Failed to start device sync service: {e}")
-        
-        device_thread = threading.Thread(target=run_device_sync, daemon=True)
-        device_thread.start()
-        self.threads.append(device_thread)
-    
-    def start_alarm_sync_service(self):
-        """Start alarm synchronization service"""
-        def run_alarm_sync():
-            try:
-                from alarm_sync_service import AlarmSyncService
-                
-                logger.info("Starting alarm sync service...")
-                service = AlarmSyncService()
-                
-                while not self.shutdown_event.is_set():
-                    try:
-                        logger.info("Syncing alarms...")
-                        service.sync_alarms()
-                        
-                        # Wait 5 minutes between alarm syncs
-                        if self.shutdown_event.wait(timeout=300):
-                            break
-                            
-                    except Exception as e:
-                        logger.error(f"Error in alarm sync: {e}")
-                        if self.shutdown_event.wait(timeout=60):
-                            break
-                
-                logger.info("Alarm sync service stopped")
-                
-            except Exception as e:
-                logger.error(f"Failed to start alarm sync service: {e}")
-        
-        alarm_thread = threading.Thread(target=run_alarm_sync, daemon=True)
-        alarm_thread.start()
-        self.threads.append(alarm_thread)
-    
-    def signal_handler(self, signum, frame):
-        """Handle shutdown signals"""
-        logger.info(f"Received signal {signum}, shutting down...")
-        self.shutdown()
+    def _sigwait_loop(self):
+        """Block until SIGINT/SIGTERM arrives, then request shutdown"""
+        sig = signal.sigwait({signal.SIGINT, signal.SIGTERM})
+        logger.info("Received signal %d, shutting down...", sig)
+        self.shutdown_event.set()
     
     def shutdown(self):
         """Gracefully shutdown all services"""
         logger.info("Shutting down Brigade Monitoring System...")
         
-        # Signal all threads to stop
+        # Signal all threads to stop, and drain anything still queued so
+        # the scheduler run loop exits instead of spinning on set events
         self.shutdown_event.set()
-        
+        for event in list(self._sched.queue):
+            try:
+                self._sched.cancel(event)
+            except ValueError:
+                pass
+
+
         # Wait for threads to finish
         for thread in self.threads:
             thread.join(timeout=5)
         
-        # Terminate any remaining processes
+        # Terminate any remaining processes: SIGTERM them all first, then
+        # poll against one shared deadline so total stop time stays ~5s
+        # regardless of process count, instead of 5s per process
         for process in self.processes:
             try:
                 process.terminate()
-                process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
+            except Exception as e:
+                logger.error("Error terminating process: %s", e)
+
+        deadline = time.monotonic() + 5
+        remaining = list(self.processes)
+        while remaining and time.monotonic() < deadline:
+            remaining = [p for p in remaining if p.poll() is None]
+            if remaining:
+                time.sleep(0.05)
+
+        # Escalate anything that ignored SIGTERM
+        for process in remaining:
+            try:
+                logger.warning("Process %s did not exit in time, killing", process.pid)
                 process.kill()
             except Exception as e:
-                logger.error(f"Error terminating process: {e}")
+                logger.error("Error killing process: %s", e)
         
         logger.info("System shutdown complete")
     
     def run(self):
         """Start all services"""
         logger.info("Starting Brigade Electronics Monitoring System")
-        logger.info(f"Web interface will be available at: http://{self.host}:{self.port}")
-        
-        # Setup signal handlers
-        signal.signal(signal.SIGINT, self.signal_handler)
-        signal.signal(signal.SIGTERM, self.signal_handler)
+        logger.info("Web interface will be available at: http://%s:%s", self.host, self.port)
         
+        # Take shutdown signals synchronously on a dedicated thread rather
+        # than via async handlers, which can fire mid-logging or mid-commit
+        # and deadlock on re-entered locks. Masking happens before the
+        # service threads start so they inherit the mask and only the
+        # sigwait thread ever sees the signal
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGINT, signal.SIGTERM})
+        threading.Thread(target=self._sigwait_loop, name='sigwait', daemon=True).start()
+
+
         try:
-            # Start all services
-            self.start_device_sync_service()
-            time.sleep(2)  # Give device sync time to complete initial sync
-            
-            self.start_gps_tracking_service()
-            self.start_alarm_sync_service()
+            # Start all services: one scheduler thread for the periodic
+            # syncs, plus the web server on its own thread. The scheduler
+            # thread runs the initial device sync to completion before the
+            # GPS and alarm jobs are entered, so the old "sleep(2) and hope
+            # the roster is there" ordering hack is structurally impossible
+            # to need
+            self.start_sync_services()
             self.start_web_server()
-            
+
             logger.info("All services started successfully")
             logger.info("System is running. Press Ctrl+C to stop.")
             
-            # Keep main thread alive
+            # Block until shutdown instead of polling every second: the
+            # event wakes this wait the moment the signal handler sets it
             try:
-                while not self.shutdown_event.is_set():
-                    time.sleep(1)
+                self.shutdown_event.wait()
             except KeyboardInterrupt:
                 logger.info("Keyboard interrupt received")
                 
         except Exception as e:
-            logger.error(f"Error starting system: {e}")
+            logger.error("Error starting system: %s", e)
         finally:
             self.shutdown()
 
@@ -2,116 +2,217 @@
 Scheduler for periodic device synchronization
 """
 import logging
+import random
+import sched
 import time
 import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from typing import Optional
 from device_sync_service import DeviceSyncService
+from database import DatabaseManager
 from config import SCHEDULER_CONFIG
+from sync_executor import EXECUTOR
 
 logger = logging.getLogger(__name__)
 
+# Single worker shared by force_sync callers; one sync runs at a time and
+# concurrent requests attach to the in-flight one
+_force_sync_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='device-force-sync')
+
 class DeviceSyncScheduler:
     """Scheduler for periodic device synchronization"""
-    
-    def __init__(self):
-        self.sync_service = DeviceSyncService()
+
+    __slots__ = (
+        'sync_service', 'update_interval_minutes', '_interval_seconds', '_running',
+        '_scheduler_future', '_stop_event', '_next_deadline',
+        '_sched', '_backoff_seconds', '_inflight', '_inflight_lock',
+        '_status_cache'
+    )
+
+    def __init__(self, sync_service: Optional[DeviceSyncService] = None):
+        self.sync_service = sync_service or DeviceSyncService()
         self.update_interval_minutes = SCHEDULER_CONFIG.update_interval_minutes
+        self._interval_seconds = SCHEDULER_CONFIG.update_interval_seconds
         self._running = False
-        self._scheduler_thread: Optional[threading.Thread] = None
+        self._scheduler_future: Optional[Future] = None
         self._stop_event = threading.Event()
-        self._next_run_time: Optional[datetime] = None
-    
+        self._next_deadline: float = 0.0
+        # Waiting on the stop event as the delay function makes stop()
+        # interrupt a pending run immediately
+        self._sched = sched.scheduler(time.monotonic, self._stop_event.wait)
+        self._backoff_seconds = 1
+        self._inflight: Optional[Future] = None
+        self._inflight_lock = threading.Lock()
+        # (timestamp, status dict); dashboard polling reuses a ~1s-old status
+        # instead of re-reading DB counts on every request
+        self._status_cache: tuple = (0.0, None)
+
     def start(self) -> bool:
         """Start the scheduler"""
         if self._running:
             logger.warning("Scheduler is already running")
             return False
-        
+
         logger.info(f"Starting device sync scheduler (interval: {self.update_interval_minutes} minutes)")
-        
-        # Validate API connection before starting
-        if not self.sync_service.validate_api_connection():
-            logger.error("Cannot start scheduler: API connection validation failed")
-            return False
-        
+
         self._running = True
         self._stop_event.clear()
-        self._scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
-        self._scheduler_thread.start()
-        
-        # Perform initial sync
-        logger.info("Performing initial device sync...")
-        initial_sync_success = self.sync_service.sync_devices()
-        if not initial_sync_success:
-            logger.warning("Initial sync failed, but scheduler will continue running")
-        
+        self._status_cache = (0.0, None)
+        # The loop runs on the shared sync pool rather than a dedicated thread
+        self._scheduler_future = EXECUTOR.submit(self._scheduler_loop)
+
         return True
-    
+
     def stop(self) -> bool:
         """Stop the scheduler"""
         if not self._running:
             logger.warning("Scheduler is not running")
             return False
-        
+
         logger.info("Stopping device sync scheduler...")
         self._running = False
+        self._status_cache = (0.0, None)
         self._stop_event.set()
-        
-        if self._scheduler_thread and self._scheduler_thread.is_alive():
-            self._scheduler_thread.join(timeout=10)  # Wait up to 10 seconds
-            
-            if self._scheduler_thread.is_alive():
-                logger.warning("Scheduler thread did not stop gracefully")
+
+        # Cancel anything still queued so the scheduler run loop drains
+        for event in list(self._sched.queue):
+            try:
+                self._sched.cancel(event)
+            except ValueError:
+                pass
+
+        if self._scheduler_future is not None:
+            try:
+                self._scheduler_future.result(timeout=10)  # Wait up to 10 seconds
+            except FutureTimeoutError:
+                logger.warning("Scheduler loop did not stop gracefully")
                 return False
-        
+
         logger.info("Device sync scheduler stopped")
         return True
-    
+
     def _scheduler_loop(self):
         """Main scheduler loop"""
+        # The initial sync doubles as the API validation: start() no longer
+        # probes the API up front, so a slow or briefly unavailable upstream
+        # at boot is retried with backoff instead of preventing startup
+        retry_seconds = 1
         while self._running and not self._stop_event.is_set():
-            try:
-                # Calculate next run time
-                self._next_run_time = datetime.now() + timedelta(minutes=self.update_interval_minutes)
-                
-                # Wait for the interval or stop event
-                if self._stop_event.wait(timeout=self.update_interval_minutes * 60):
-                    # Stop event was set
-                    break
-                
-                if not self._running:
-                    break
-                
-                # Perform sync
-                logger.info("Scheduled device sync starting...")
-                success = self.sync_service.sync_devices()
-                
-                if success:
-                    logger.info("Scheduled device sync completed successfully")
-                else:
-                    logger.error("Scheduled device sync failed")
-                
-            except Exception as e:
-                logger.error(f"Error in scheduler loop: {e}")
-                # Continue running even if there's an error
-                time.sleep(60)  # Wait 1 minute before retrying
-    
+            logger.info("Performing initial device sync...")
+            if self.sync_service.sync_devices():
+                break
+            logger.warning(f"Initial sync failed, retrying in {retry_seconds}s...")
+            if self._stop_event.wait(timeout=retry_seconds * random.uniform(0.8, 1.2)):
+                return
+            retry_seconds = min(retry_seconds * 2, 60)
+
+        # stop() may have arrived during the initial sync itself — after its
+        # queue drain already ran. Entering a new event then would make
+        # sched.run() spin (the stop event's wait returns immediately) for
+        # the whole interval, so bail out before touching the queue
+        if not self._running or self._stop_event.is_set():
+            return
+
+        # Hand periodic runs to sched; its queue replaces the hand-rolled
+        # deadline/wait loop
+        self._backoff_seconds = 1
+        self._next_deadline = time.monotonic() + self._interval_seconds
+        self._sched.enterabs(self._next_deadline, 1, self._tick)
+        self._sched.run()
+
+    def _tick(self):
+        """Run one scheduled sync and re-enter the next one"""
+        if not self._running or self._stop_event.is_set():
+            return
+
+        try:
+            # Perform sync
+            logger.info("Scheduled device sync starting...")
+            success = self.sync_service.sync_devices()
+            self._status_cache = (0.0, None)
+
+            if success:
+                logger.info("Scheduled device sync completed successfully")
+            else:
+                logger.error("Scheduled device sync failed")
+
+            self._backoff_seconds = 1
+            # Advance from the previous deadline so sync duration doesn't
+            # drift the cadence
+            self._next_deadline += self._interval_seconds
+
+        except Exception as e:
+            logger.error(f"Error in scheduler loop: {e}")
+            # Retry sooner than the full interval, backing off exponentially
+            # with jitter on repeated errors
+            self._next_deadline = time.monotonic() + self._backoff_seconds * random.uniform(0.8, 1.2)
+            self._backoff_seconds = min(self._backoff_seconds * 2, 60)
+
+        # Re-enter only while still running: if stop() fired during the sync
+        # its queue drain already happened, and a new event would make
+        # sched.run spin on the set stop event until the next deadline
+        if self._running and not self._stop_event.is_set():
+            self._sched.enterabs(self._next_deadline, 1, self._tick)
+
     def get_status(self) -> dict:
-        """Get scheduler status"""
+        """Get scheduler status (memoized for one second)"""
+        cached_at, cached = self._status_cache
+        if cached is not None and time.monotonic() - cached_at < 1.0:
+            return cached
+
         sync_status = self.sync_service.get_sync_status()
-        
-        return {
+
+        # Only convert the monotonic deadline to wall-clock time when asked
+        next_run_time = None
+        if self._running and self._next_deadline:
+            wait_seconds = max(0, self._next_deadline - time.monotonic())
+            next_run_time = (datetime.now() + timedelta(seconds=wait_seconds)).isoformat()
+
+        status = {
             'scheduler_running': self._running,
             'update_interval_minutes': self.update_interval_minutes,
-            'next_run_time': self._next_run_time.isoformat() if self._next_run_time else None,
+            'next_run_time': next_run_time,
             'sync_status': sync_status
         }
-    
+        self._status_cache = (time.monotonic(), status)
+        return status
+
+    @classmethod
+    def read_status_only(cls) -> dict:
+        """Status snapshot for the CLI without scheduler machinery
+
+        Builds only a DatabaseManager — no sync service, no API client,
+        no executor submission — so the status command reads counts and
+        timestamps and exits. The dict matches get_status()'s shape with
+        the runtime-only fields at their idle values.
+        """
+        stats = DatabaseManager().get_stats()
+        return {
+            'scheduler_running': False,
+            'update_interval_minutes': SCHEDULER_CONFIG.update_interval_minutes,
+            'next_run_time': None,
+            'sync_status': {
+                'last_sync_time': None,
+                'sync_in_progress': False,
+                'total_devices': stats['device_count'],
+                'last_db_update': stats['last_device_update']
+            }
+        }
+
     def force_sync(self) -> bool:
-        """Force an immediate sync"""
-        return self.sync_service.force_sync()
-    
+        """Force an immediate sync
+
+        Concurrent callers coalesce onto the sync already in flight instead
+        of queuing a second back-to-back sync against the upstream API.
+        """
+        with self._inflight_lock:
+            future = self._inflight
+            if future is None or future.done():
+                future = _force_sync_executor.submit(self.sync_service.force_sync)
+                self._inflight = future
+        return future.result()
+
     def is_running(self) -> bool:
         """Check if scheduler is running"""
-        return self._running
\ No newline at end of file
+        return self._running
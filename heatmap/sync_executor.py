@@ -0,0 +1,8 @@
+"""
+Shared thread pool for the periodic sync scheduler loops
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+# One pool hosts every scheduler loop so the services reuse a small set of
+# threads instead of each spawning its own dedicated daemon thread
+EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sync')
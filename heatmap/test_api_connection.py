@@ -2,7 +2,9 @@
 """
 Test API connection to Brigade Electronics server
 """
+import socket
 import sys
+from urllib.parse import urlparse
 from api_client import BrigadeAPIClient
 from config import API_CONFIG
 
@@ -13,10 +15,24 @@ def test_api_connection():
     print(f"Username: {API_CONFIG.username}")
     print(f"Password: {'*' * len(API_CONFIG.password)}")
     
+    # Pre-flight TCP probe with a 3-second timeout so an unreachable host
+    # fails in seconds rather than sitting through the full HTTP timeout
+    # and its retries
+    parsed = urlparse(API_CONFIG.base_url)
+    port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    print(f"\n0. Probing TCP connectivity to {parsed.hostname}:{port}...")
+    try:
+        socket.create_connection((parsed.hostname, port), timeout=3).close()
+        print("SUCCESS: API host is reachable")
+    except OSError as e:
+        print(f"FAILED: API host unreachable ({e})")
+        print("   Check the network and the base_url in config.py")
+        return False
+
     try:
         # Create API client
         client = BrigadeAPIClient()
-        
+
         # Test authentication
         print("\n1. Testing authentication...")
         if client.authenticate():
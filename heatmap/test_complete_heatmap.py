@@ -3,31 +3,38 @@
 Complete test of the alarm heatmap with multi-select alarm type filter
 """
 import sys
-import json
-import tempfile
-import os
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from web_server import AlarmHeatmapServer
-from database import DatabaseManager
-from config import DATABASE_CONFIG
+from test_fixtures import check, make_private_test_db
 from logging_config import setup_logging
 
+# Expected alarm-type sets for the filter assertions, built once at module
+# scope: a literal list inside the `all(...)` predicate is reconstructed on
+# every iteration, and frozenset membership is O(1)
+_EMERGENCY_TYPES = frozenset({13, 37})
+_BEHAVIOR_TYPES = frozenset({58, 60, 61, 168})
+_DEV001_TYPES = frozenset({13, 58, 61})
+
+# Expected name prefixes for a sample of the expanded alarm-type list,
+# built once at module scope rather than per test invocation
+_TEST_NAMES = {
+    168: "Using Phone",
+    64: "Forward Collision Warning",
+    37: "SOS",
+    26: "Harsh Acceleration"
+}
+
 def test_complete_heatmap_functionality():
     """Test complete heatmap functionality including multi-select alarm types"""
     print("Testing Complete Heatmap Functionality...")
-    
-    # Create temporary database for testing
-    temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
-    temp_db.close()
-    
+
     try:
-        # Patch database path
-        original_path = DATABASE_CONFIG.db_path
-        DATABASE_CONFIG.db_path = temp_db.name
-        
-        # Initialize database with comprehensive test data
-        db_manager = DatabaseManager()
-        
+        # Private tmpfs-backed database from the shared fixture helper:
+        # no DATABASE_CONFIG patching and cleanup happens once at exit
+        _, db_manager = make_private_test_db()
+
         # Insert test devices
         test_devices = [
             {
@@ -42,160 +49,182 @@ def test_complete_heatmap_functionality():
             }
         ]
         
-        for device in test_devices:
-            db_manager.upsert_device(device)
         
-        # Insert comprehensive alarm data with various types
-        now = datetime.now()
+        # Insert comprehensive alarm data with various types. str() on a
+        # microsecond-free datetime renders 'YYYY-MM-DD HH:MM:SS' directly,
+        # so the fixture skips strftime's format parsing on every row
+        now = datetime.now().replace(microsecond=0)
+        def ts(minutes):
+            return str(now - timedelta(minutes=minutes))
+
         comprehensive_alarms = [
             # Emergency alarms
-            {'terid': 'DEV001', 'gpstime': (now - timedelta(minutes=5)).strftime('%Y-%m-%d %H:%M:%S'),
+            {'terid': 'DEV001', 'gpstime': ts(5),
              'gpslat': 40.7589, 'gpslng': -73.9851, 'type': 13, 'content': 'Panic button pressed'},
-            {'terid': 'DEV002', 'gpstime': (now - timedelta(minutes=10)).strftime('%Y-%m-%d %H:%M:%S'),
+            {'terid': 'DEV002', 'gpstime': ts(10),
              'gpslat': 40.7614, 'gpslng': -73.9776, 'type': 37, 'content': 'SOS activated'},
-             
+
             # Driving behavior alarms
-            {'terid': 'DEV001', 'gpstime': (now - timedelta(minutes=15)).strftime('%Y-%m-%d %H:%M:%S'),
+            {'terid': 'DEV001', 'gpstime': ts(15),
              'gpslat': 40.7505, 'gpslng': -73.9934, 'type': 58, 'content': 'Driver fatigue detected'},
-            {'terid': 'DEV002', 'gpstime': (now - timedelta(minutes=20)).strftime('%Y-%m-%d %H:%M:%S'),
+            {'terid': 'DEV002', 'gpstime': ts(20),
              'gpslat': 40.7580, 'gpslng': -73.9855, 'type': 60, 'content': 'Phone usage detected'},
-            {'terid': 'DEV001', 'gpstime': (now - timedelta(minutes=25)).strftime('%Y-%m-%d %H:%M:%S'),
+            {'terid': 'DEV001', 'gpstime': ts(25),
              'gpslat': 40.7620, 'gpslng': -73.9800, 'type': 61, 'content': 'Smoking detected'},
-             
+
             # Speed and movement alarms
-            {'terid': 'DEV002', 'gpstime': (now - timedelta(minutes=30)).strftime('%Y-%m-%d %H:%M:%S'),
+            {'terid': 'DEV002', 'gpstime': ts(30),
              'gpslat': 40.7550, 'gpslng': -73.9900, 'type': 24, 'content': 'Overspeed detected'},
-            {'terid': 'DEV001', 'gpstime': (now - timedelta(minutes=35)).strftime('%Y-%m-%d %H:%M:%S'),
+            {'terid': 'DEV001', 'gpstime': ts(35),
              'gpslat': 40.7600, 'gpslng': -73.9750, 'type': 17, 'content': 'Hard braking'},
-            {'terid': 'DEV002', 'gpstime': (now - timedelta(minutes=40)).strftime('%Y-%m-%d %H:%M:%S'),
+            {'terid': 'DEV002', 'gpstime': ts(40),
              'gpslat': 40.7530, 'gpslng': -73.9950, 'type': 26, 'content': 'Harsh acceleration'},
-             
+
             # System alarms
-            {'terid': 'DEV001', 'gpstime': (now - timedelta(minutes=45)).strftime('%Y-%m-%d %H:%M:%S'),
+            {'terid': 'DEV001', 'gpstime': ts(45),
              'gpslat': 40.7570, 'gpslng': -73.9820, 'type': 4, 'content': 'HDD error'},
-            {'terid': 'DEV002', 'gpstime': (now - timedelta(minutes=50)).strftime('%Y-%m-%d %H:%M:%S'),
+            {'terid': 'DEV002', 'gpstime': ts(50),
              'gpslat': 40.7610, 'gpslng': -73.9870, 'type': 16, 'content': 'Low voltage'},
-             
+
             # New alarm types from expanded list
-            {'terid': 'DEV001', 'gpstime': (now - timedelta(minutes=55)).strftime('%Y-%m-%d %H:%M:%S'),
+            {'terid': 'DEV001', 'gpstime': ts(55),
              'gpslat': 40.7540, 'gpslng': -73.9920, 'type': 64, 'content': 'Forward collision warning'},
-            {'terid': 'DEV002', 'gpstime': (now - timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S'),
+            {'terid': 'DEV002', 'gpstime': ts(60),
              'gpslat': 40.7560, 'gpslng': -73.9840, 'type': 168, 'content': 'Using phone detected'}
         ]
         
-        # Insert alarms with full details
-        for alarm in comprehensive_alarms:
-            full_alarm = {
-                'terid': alarm['terid'],
-                'gpstime': alarm['gpstime'],
-                'altitude': 100, 'direction': 90,
-                'gpslat': alarm['gpslat'], 'gpslng': alarm['gpslng'],
-                'speed': 30, 'recordspeed': 30, 'state': 0,
-                'time': alarm['gpstime'],
-                'type': alarm['type'],
-                'content': alarm['content'], 'cmdtype': 2
-            }
-            db_manager.insert_alarm(full_alarm)
-        
-        # Create Flask test client
-        server = AlarmHeatmapServer()
-        client = server.app.test_client()
+        # Insert alarms with full details in one batch call: one transaction
+        # and one fsync for the whole fixture instead of a commit per row.
+        # The constant columns are spelled once and merged in, rather than
+        # re-keyed into a fresh 12-field dict per row
+        alarm_defaults = {
+            'altitude': 100, 'direction': 90, 'speed': 30,
+            'recordspeed': 30, 'state': 0, 'cmdtype': 2
+        }
+        full_alarms = [
+            {**alarm_defaults, **alarm, 'time': alarm['gpstime']}
+            for alarm in comprehensive_alarms
+        ]
+        # The temp DB is throwaway, so load the fixtures with durability
+        # off: no fsync at all during setup. One batch call per table keeps
+        # it to a single transaction each
+        with db_manager.fast_bulk_mode():
+            db_manager.upsert_devices_batch(test_devices)
+            db_manager.insert_alarms_batch(full_alarms)
         
+        # Create Flask test client bound to the private test database
+        server = AlarmHeatmapServer(db_manager=db_manager)
+
         print(f"  Inserted {len(comprehensive_alarms)} test alarms")
-        
+
+        # The endpoint checks are independent reads against a static
+        # fixture database, so fetch them all concurrently (one test
+        # client per thread — a client instance is not thread-safe) and
+        # assert on the collected responses in order. There is no pytest
+        # suite to parametrize here; these scripts run standalone
+        def _get(endpoint):
+            return server.app.test_client().get(endpoint)
+
+        endpoints = {
+            'all': '/api/alarms?hours=2&limit=100',
+            'emergency': '/api/alarms?hours=2&alarm_types=13,37',
+            'behavior': '/api/alarms?hours=2&alarm_types=58,60,61,168',
+            'device': '/api/alarms?hours=2&device_id=DEV001&alarm_types=13,58,61',
+            'types': '/api/alarm-types',
+            'detail': '/api/alarm/1',
+            'stats': '/api/stats',
+        }
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {name: executor.submit(_get, url) for name, url in endpoints.items()}
+            responses = {name: future.result() for name, future in futures.items()}
+
         # Test 1: All alarm types
-        response = client.get('/api/alarms?hours=2&limit=100')
+        response = responses['all']
         all_alarms_test = response.status_code == 200
         if all_alarms_test:
-            data = json.loads(response.data)
+            data = response.get_json()
             all_alarms_test = data.get('success', False) and len(data.get('data', [])) == len(comprehensive_alarms)
-        print(f"  All alarms test: {'PASS' if all_alarms_test else 'FAIL'}")
+        check("All alarms test", all_alarms_test)
         
         # Test 2: Emergency alarms only (13, 37)
-        response = client.get('/api/alarms?hours=2&alarm_types=13,37')
+        response = responses['emergency']
         emergency_test = response.status_code == 200
         if emergency_test:
-            data = json.loads(response.data)
-            emergency_test = (data.get('success', False) and 
-                            len(data.get('data', [])) == 2 and
-                            all(alarm['alarm_type'] in [13, 37] for alarm in data['data']))
-        print(f"  Emergency alarms filter test: {'PASS' if emergency_test else 'FAIL'}")
+            data = response.get_json()
+            rows = data.get('data', [])
+            emergency_test = (data.get('success', False) and
+                            len(rows) == 2 and
+                            all(alarm['alarm_type'] in _EMERGENCY_TYPES for alarm in rows))
+        check("Emergency alarms filter test", emergency_test)
         
         # Test 3: Driver behavior alarms (58, 60, 61, 168)
-        response = client.get('/api/alarms?hours=2&alarm_types=58,60,61,168')
+        response = responses['behavior']
         behavior_test = response.status_code == 200
         if behavior_test:
-            data = json.loads(response.data)
-            behavior_test = (data.get('success', False) and 
-                           len(data.get('data', [])) == 4 and
-                           all(alarm['alarm_type'] in [58, 60, 61, 168] for alarm in data['data']))
-        print(f"  Driver behavior alarms filter test: {'PASS' if behavior_test else 'FAIL'}")
+            data = response.get_json()
+            rows = data.get('data', [])
+            behavior_test = (data.get('success', False) and
+                           len(rows) == 4 and
+                           all(alarm['alarm_type'] in _BEHAVIOR_TYPES for alarm in rows))
+        check("Driver behavior alarms filter test", behavior_test)
         
         # Test 4: Device filter combined with alarm type
-        response = client.get('/api/alarms?hours=2&device_id=DEV001&alarm_types=13,58,61')
+        response = responses['device']
         device_alarm_test = response.status_code == 200
         if device_alarm_test:
-            data = json.loads(response.data)
-            device_alarm_test = (data.get('success', False) and 
-                               len(data.get('data', [])) == 3 and
-                               all(alarm['terid'] == 'DEV001' and alarm['alarm_type'] in [13, 58, 61] 
-                                   for alarm in data['data']))
-        print(f"  Device + alarm type filter test: {'PASS' if device_alarm_test else 'FAIL'}")
+            data = response.get_json()
+            rows = data.get('data', [])
+            device_alarm_test = (data.get('success', False) and
+                               len(rows) == 3 and
+                               all(alarm['terid'] == 'DEV001' and alarm['alarm_type'] in _DEV001_TYPES
+                                   for alarm in rows))
+        check("Device + alarm type filter test", device_alarm_test)
         
         # Test 5: Alarm types API with comprehensive list
-        response = client.get('/api/alarm-types')
+        response = responses['types']
         types_test = response.status_code == 200
         comprehensive_types = []
         if types_test:
-            data = json.loads(response.data)
+            data = response.get_json()
             types_test = data.get('success', False)
             comprehensive_types = data.get('alarm_types', [])
         
         expected_comprehensive_types = [13, 37, 58, 60, 61, 24, 17, 26, 4, 16, 64, 168]
         found_comprehensive = [t['type'] for t in comprehensive_types if t['type'] in expected_comprehensive_types]
         comprehensive_types_test = len(found_comprehensive) == len(expected_comprehensive_types)
-        print(f"  Comprehensive alarm types test: {'PASS' if comprehensive_types_test else 'FAIL'}")
+        check("Comprehensive alarm types test", comprehensive_types_test)
         
         # Test 6: Alarm detail modal data
-        response = client.get('/api/alarm/1')
+        response = responses['detail']
         detail_test = response.status_code == 200
         if detail_test:
-            data = json.loads(response.data)
+            data = response.get_json()
             detail_test = (data.get('success', False) and 
                          data.get('alarm') is not None and
                          data.get('device') is not None)
-        print(f"  Alarm detail modal test: {'PASS' if detail_test else 'FAIL'}")
+        check("Alarm detail modal test", detail_test)
         
         # Test 7: Statistics API
-        response = client.get('/api/stats')
+        response = responses['stats']
         stats_test = response.status_code == 200
         if stats_test:
-            data = json.loads(response.data)
+            data = response.get_json()
             stats_test = (data.get('success', False) and 
                         data.get('stats', {}).get('total_devices') == 2)
-        print(f"  Statistics API test: {'PASS' if stats_test else 'FAIL'}")
-        
-        # Test 8: Verify alarm type names from expanded list
-        test_names = {
-            168: "Using Phone",
-            64: "Forward Collision Warning", 
-            37: "SOS",
-            26: "Harsh Acceleration"
-        }
+        check("Statistics API test", stats_test)
         
+        # Test 8: Verify alarm type names from expanded list. One .get()
+        # per entry instead of an `in` probe followed by a re-index, with
+        # early exit on the first mismatch
         names_test = True
         for alarm_type_data in comprehensive_types:
-            if alarm_type_data['type'] in test_names:
-                expected = test_names[alarm_type_data['type']]
-                if not alarm_type_data['name'].startswith(expected):
-                    names_test = False
-                    print(f"    Name mismatch: Type {alarm_type_data['type']} expected '{expected}' got '{alarm_type_data['name']}'")
-                    break
-        print(f"  Expanded alarm type names test: {'PASS' if names_test else 'FAIL'}")
-        
-        # Restore original database path
-        DATABASE_CONFIG.db_path = original_path
-        
+            expected = _TEST_NAMES.get(alarm_type_data['type'])
+            if expected is not None and not alarm_type_data['name'].startswith(expected):
+                names_test = False
+                print(f"    Name mismatch: Type {alarm_type_data['type']} expected '{expected}' got '{alarm_type_data['name']}'")
+                break
+        check("Expanded alarm type names test", names_test)
+
         return all([
             all_alarms_test,
             emergency_test,
@@ -209,13 +238,8 @@ def test_complete_heatmap_functionality():
         
     except Exception as e:
         print(f"  Complete heatmap test failed: {e}")
-        import traceback
         traceback.print_exc()
         return False
-    finally:
-        # Cleanup
-        if os.path.exists(temp_db.name):
-            os.unlink(temp_db.name)
 
 def main():
     """Run complete heatmap tests"""
@@ -0,0 +1,53 @@
+"""
+Shared fixtures and check helpers for the test scripts
+"""
+import atexit
+import os
+import tempfile
+from database import DatabaseManager
+
+# Opt-in fail-fast for CI retry loops: abort on the first failed check
+# instead of running the remaining ones. Normal runs are unchanged
+FAIL_FAST = os.environ.get('TEST_FAIL_FAST') == '1'
+
+def check(name, cond):
+    """Print one PASS/FAIL line; under FAIL_FAST abort on first failure"""
+    print(f"  {name}: {'PASS' if cond else 'FAIL'}")
+    if FAIL_FAST and not cond:
+        raise AssertionError(name)
+    return cond
+
+# Keep throwaway test databases on tmpfs when available so fixture inserts
+# never touch a real disk (DatabaseManager opens a connection per call, so a
+# :memory: database would not survive across operations)
+_TMPFS_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Private databases handed out by make_private_test_db, removed at exit
+_private_paths: list = []
+
+def make_private_test_db():
+    """Return (path, db_manager) for a brand-new private test database
+
+    Nothing global (DATABASE_CONFIG included) is touched, so tests using
+    this can safely run in parallel.
+    """
+    temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db', dir=_TMPFS_DIR)
+    temp_db.close()
+    _private_paths.append(temp_db.name)
+    return temp_db.name, DatabaseManager(db_path=temp_db.name)
+
+def reset_test_db(db_manager: DatabaseManager):
+    """Clear all tables so the next test starts from an empty database"""
+    with db_manager._write_connection() as conn:
+        cursor = conn.cursor()
+        for table in ('alarms', 'gps', 'devices'):
+            cursor.execute(f"DELETE FROM {table}")
+        conn.commit()
+
+def _cleanup():
+    """Remove the test database files at interpreter exit"""
+    for path in _private_paths:
+        if path and os.path.exists(path):
+            os.unlink(path)
+
+atexit.register(_cleanup)
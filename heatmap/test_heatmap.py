@@ -3,31 +3,31 @@
 Test script for the alarm heatmap functionality
 """
 import sys
-import json
-import tempfile
-import os
-from unittest.mock import patch
 from web_server import AlarmHeatmapServer
-from database import DatabaseManager
-from config import DATABASE_CONFIG
+from test_fixtures import check, make_private_test_db
 from logging_config import setup_logging
 
+# Server construction builds the Flask app, registers every route and
+# opens database connections — do it once per process and share it
+# across tests instead of paying that per test
+_server = None
+
+def _get_server(db_manager=None):
+    """Return the shared AlarmHeatmapServer, building it on first use"""
+    global _server
+    if _server is None:
+        _server = AlarmHeatmapServer(db_manager=db_manager)
+    return _server
+
 def test_heatmap_api():
     """Test the heatmap API endpoints"""
     print("Testing Heatmap API endpoints...")
-    
-    # Create temporary database for testing
-    temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
-    temp_db.close()
-    
+
     try:
-        # Patch database path
-        original_path = DATABASE_CONFIG.db_path
-        DATABASE_CONFIG.db_path = temp_db.name
-        
-        # Initialize database with test data
-        db_manager = DatabaseManager()
-        
+        # Private tmpfs-backed database from the shared fixture helper:
+        # no DATABASE_CONFIG patching and cleanup happens once at exit
+        _, db_manager = make_private_test_db()
+
         # Insert test device
         test_device = {
             'carlicense': 'TEST123',
@@ -41,7 +41,6 @@ def test_heatmap_api():
             'linktype': '124',
             'companyname': 'Test Company'
         }
-        db_manager.upsert_device(test_device)
         
         # Insert test alarms with GPS coordinates
         test_alarms = [
@@ -77,60 +76,62 @@ def test_heatmap_api():
             }
         ]
         
-        for alarm in test_alarms:
-            db_manager.insert_alarm(alarm)
+        # The temp DB is throwaway, so load the fixtures with durability
+        # off, and in one batch call per table: a single transaction each
+        # instead of a commit (and fsync) per row
+        with db_manager.fast_bulk_mode():
+            db_manager.upsert_device(test_device)
+            db_manager.insert_alarms_batch(test_alarms)
         
-        # Create Flask test client
-        server = AlarmHeatmapServer()
+        # Create Flask test client against the shared server, bound to the
+        # test database
+        server = _get_server(db_manager)
         client = server.app.test_client()
         
         # Test main page
         response = client.get('/')
-        print(f"  Main page test: {'PASS' if response.status_code == 200 else 'FAIL'}")
+        check("Main page test", response.status_code == 200)
         
         # Test alarms API
         response = client.get('/api/alarms?hours=24&limit=100')
         alarms_success = response.status_code == 200
         if alarms_success:
-            data = json.loads(response.data)
+            data = response.get_json()
             alarms_success = data.get('success', False) and len(data.get('data', [])) > 0
-        print(f"  Alarms API test: {'PASS' if alarms_success else 'FAIL'}")
+        check("Alarms API test", alarms_success)
         
         # Test devices API
         response = client.get('/api/devices')
         devices_success = response.status_code == 200
         if devices_success:
-            data = json.loads(response.data)
+            data = response.get_json()
             devices_success = data.get('success', False) and len(data.get('devices', [])) > 0
-        print(f"  Devices API test: {'PASS' if devices_success else 'FAIL'}")
+        check("Devices API test", devices_success)
         
         # Test alarm types API
         response = client.get('/api/alarm-types')
         types_success = response.status_code == 200
         if types_success:
-            data = json.loads(response.data)
+            data = response.get_json()
             types_success = data.get('success', False)
-        print(f"  Alarm Types API test: {'PASS' if types_success else 'FAIL'}")
+        check("Alarm Types API test", types_success)
         
         # Test alarm detail API
         response = client.get('/api/alarm/1')
         detail_success = response.status_code == 200
         if detail_success:
-            data = json.loads(response.data)
+            data = response.get_json()
             detail_success = data.get('success', False) and data.get('alarm') is not None
-        print(f"  Alarm Detail API test: {'PASS' if detail_success else 'FAIL'}")
+        check("Alarm Detail API test", detail_success)
         
         # Test stats API
         response = client.get('/api/stats')
         stats_success = response.status_code == 200
         if stats_success:
-            data = json.loads(response.data)
+            data = response.get_json()
             stats_success = data.get('success', False)
-        print(f"  Stats API test: {'PASS' if stats_success else 'FAIL'}")
-        
-        # Restore original database path
-        DATABASE_CONFIG.db_path = original_path
-        
+        check("Stats API test", stats_success)
+
         return all([
             alarms_success,
             devices_success, 
@@ -142,18 +143,16 @@ def test_heatmap_api():
     except Exception as e:
         print(f"  Heatmap API test failed: {e}")
         return False
-    finally:
-        # Cleanup
-        if os.path.exists(temp_db.name):
-            os.unlink(temp_db.name)
 
 def test_heatmap_data_conversion():
     """Test alarm data conversion to heatmap format"""
     print("Testing Heatmap Data Conversion...")
     
     try:
-        server = AlarmHeatmapServer()
-        
+        # Reuse the shared server; this test only exercises pure conversion
+        # helpers and never touches the database
+        server = _get_server()
+
         # Test data conversion
         test_alarms = [
             {
@@ -186,12 +185,12 @@ def test_heatmap_data_conversion():
         
         # Should only include the valid coordinate alarm
         conversion_success = len(heatmap_data) == 1 and heatmap_data[0]['id'] == 1
-        print(f"  Data conversion test: {'PASS' if conversion_success else 'FAIL'}")
+        check("Data conversion test", conversion_success)
         
         # Test intensity calculation
         intensity = server._get_alarm_intensity(13)  # Panic button
         intensity_success = intensity == 1.0  # Should be highest intensity
-        print(f"  Intensity calculation test: {'PASS' if intensity_success else 'FAIL'}")
+        check("Intensity calculation test", intensity_success)
         
         return conversion_success and intensity_success
         
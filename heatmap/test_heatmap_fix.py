@@ -2,10 +2,8 @@
 """
 Test script to verify the heatmap fix works
 """
-import time
-import requests
-import threading
 from logging_config import setup_logging
+from web_server import AlarmHeatmapServer
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,27 +12,18 @@ def test_web_server_endpoints():
     """Test web server endpoints to ensure they work"""
     print("🔍 Testing web server endpoints...")
     
-    # Start web server in background
-    def start_server():
-        from web_server import AlarmHeatmapServer
-        server = AlarmHeatmapServer(host='127.0.0.1', port=5002, debug=False)
-        server.run()
-    
-    server_thread = threading.Thread(target=start_server, daemon=True)
-    server_thread.start()
-    
-    # Wait for server to start
-    time.sleep(3)
-    
+    # Requests go straight into the WSGI app through Werkzeug's test
+    # client: no background server thread, no 3-second warm-up sleep and
+    # no TCP/HTTP round trip per call
+    client = AlarmHeatmapServer().app.test_client()
+
     try:
-        base_url = "http://127.0.0.1:5002"
-        
         # Test main heatmap page
         print("  Testing main heatmap page...")
-        response = requests.get(f"{base_url}/", timeout=10)
+        response = client.get("/")
         if response.status_code == 200:
             # Check if the page loads without JavaScript errors by looking for key elements
-            content = response.text
+            content = response.get_data(as_text=True)
             if 'alarm-type-filter' in content and 'loadHeatmapData' in content:
                 print("  ✅ Main heatmap page loaded successfully")
             else:
@@ -45,7 +34,7 @@ def test_web_server_endpoints():
         
         # Test GPS tracking page
         print("  Testing GPS tracking page...")
-        response = requests.get(f"{base_url}/gps-tracking", timeout=10)
+        response = client.get("/gps-tracking")
         if response.status_code == 200:
             print("  ✅ GPS tracking page loaded successfully")
         else:
@@ -63,10 +52,12 @@ def test_web_server_endpoints():
         for endpoint, description in endpoints_to_test:
             print(f"  Testing {description} endpoint...")
             try:
-                response = requests.get(f"{base_url}{endpoint}", timeout=10)
+                response = client.get(endpoint)
                 if response.status_code == 200:
-                    try:
-                        data = response.json()
+                    data = response.get_json(silent=True)
+                    if data is None:
+                        print(f"  ⚠️  {description} endpoint returned non-JSON response")
+                    else:
                         if 'success' in data:
                             if data['success']:
                                 print(f"  ✅ {description} endpoint working")
@@ -74,8 +65,6 @@ def test_web_server_endpoints():
                                 print(f"  ⚠️  {description} endpoint returned error: {data.get('error', 'Unknown')}")
                         else:
                             print(f"  ✅ {description} endpoint returned data")
-                    except ValueError:
-                        print(f"  ⚠️  {description} endpoint returned non-JSON response")
                 else:
                     print(f"  ❌ {description} endpoint returned status {response.status_code}")
             except Exception as e:
@@ -4,28 +4,21 @@ Test script for the multi-select alarm type filter functionality
 """
 import sys
 import json
-import tempfile
-import os
+from concurrent.futures import ThreadPoolExecutor
 from web_server import AlarmHeatmapServer
 from database import DatabaseManager
-from config import DATABASE_CONFIG
 from logging_config import setup_logging
+from test_fixtures import make_private_test_db
+
+TIME_FMT = '%Y-%m-%d %H:%M:%S'
 
 def test_multiselect_filter():
     """Test the multi-select alarm type filter"""
     print("Testing Multi-Select Alarm Type Filter...")
     
-    # Create temporary database for testing
-    temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
-    temp_db.close()
-    
     try:
-        # Patch database path
-        original_path = DATABASE_CONFIG.db_path
-        DATABASE_CONFIG.db_path = temp_db.name
-        
-        # Initialize database with test data
-        db_manager = DatabaseManager()
+        # Private test database; nothing global is mutated
+        _, db_manager = make_private_test_db()
         
         # Insert test device
         test_device = {
@@ -40,70 +33,90 @@ def test_multiselect_filter():
             'linktype': '124',
             'companyname': 'Test Company'
         }
-        db_manager.upsert_device(test_device)
+        # Batch upsert matches the production sync path (one transaction)
+        db_manager.upsert_devices_batch([test_device])
         
-        # Insert test alarms with different types using current time
+        # Insert test alarms with different types using current time; each
+        # timestamp is formatted once so gpstime and time always match
         from datetime import datetime, timedelta
         now = datetime.now()
+        ts_1h = (now - timedelta(hours=1)).strftime(TIME_FMT)
+        ts_30m = (now - timedelta(minutes=30)).strftime(TIME_FMT)
+        ts_10m = (now - timedelta(minutes=10)).strftime(TIME_FMT)
+        ts_5m = (now - timedelta(minutes=5)).strftime(TIME_FMT)
         
         test_alarms = [
             {
                 'terid': 'TEST001',
-                'gpstime': (now - timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S'),
+                'gpstime': ts_1h,
                 'altitude': 100, 'direction': 90,
                 'gpslat': 40.7589, 'gpslng': -73.9851,
                 'speed': 30, 'recordspeed': 30, 'state': 0,
-                'time': (now - timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S'),
+                'time': ts_1h,
                 'type': 13,  # Panic Button
                 'content': 'Panic button pressed', 'cmdtype': 2
             },
             {
                 'terid': 'TEST001',
-                'gpstime': (now - timedelta(minutes=30)).strftime('%Y-%m-%d %H:%M:%S'),
+                'gpstime': ts_30m,
                 'altitude': 120, 'direction': 180,
                 'gpslat': 40.7614, 'gpslng': -73.9776,
                 'speed': 45, 'recordspeed': 45, 'state': 0,
-                'time': (now - timedelta(minutes=30)).strftime('%Y-%m-%d %H:%M:%S'),
+                'time': ts_30m,
                 'type': 17,  # G-Force
                 'content': 'Hard braking detected', 'cmdtype': 2
             },
             {
                 'terid': 'TEST001',
-                'gpstime': (now - timedelta(minutes=10)).strftime('%Y-%m-%d %H:%M:%S'),
+                'gpstime': ts_10m,
                 'altitude': 110, 'direction': 270,
                 'gpslat': 40.7505, 'gpslng': -73.9934,
                 'speed': 60, 'recordspeed': 60, 'state': 0,
-                'time': (now - timedelta(minutes=10)).strftime('%Y-%m-%d %H:%M:%S'),
+                'time': ts_10m,
                 'type': 24,  # Overspeed
                 'content': 'Speed limit exceeded', 'cmdtype': 2
             },
             {
                 'terid': 'TEST001',
-                'gpstime': (now - timedelta(minutes=5)).strftime('%Y-%m-%d %H:%M:%S'),
+                'gpstime': ts_5m,
                 'altitude': 95, 'direction': 45,
                 'gpslat': 40.7580, 'gpslng': -73.9855,
                 'speed': 25, 'recordspeed': 25, 'state': 0,
-                'time': (now - timedelta(minutes=5)).strftime('%Y-%m-%d %H:%M:%S'),
+                'time': ts_5m,
                 'type': 58,  # Driver Fatigue
                 'content': 'Driver fatigue detected', 'cmdtype': 2
             }
         ]
         
-        for alarm in test_alarms:
-            db_manager.insert_alarm(alarm)
+        # Batch insert commits all fixtures in one go instead of one
+        # transaction per alarm
+        db_manager.insert_alarms_batch(test_alarms)
         
-        # Create Flask test client
-        server = AlarmHeatmapServer()
-        client = server.app.test_client()
+        # The four API calls are independent reads, so issue them
+        # concurrently; each thread gets its own test client because the
+        # client keeps per-request context
+        server = AlarmHeatmapServer(db_manager=db_manager)
+
+        def fetch(path):
+            client = server.app.test_client()
+            response = client.get(path)
+            body = json.loads(response.data) if response.status_code == 200 else None
+            return response.status_code, body
+
+        cases = {
+            'types': '/api/alarm-types',
+            'all': '/api/alarms?hours=8760&limit=100',  # 1 year
+            'single': '/api/alarms?hours=8760&alarm_types=13',
+            'multi': '/api/alarms?hours=24&alarm_types=13,17,24'
+        }
+        with ThreadPoolExecutor(max_workers=len(cases)) as executor:
+            futures = {name: executor.submit(fetch, path) for name, path in cases.items()}
+            responses = {name: future.result() for name, future in futures.items()}
         
         # Test alarm types API
-        response = client.get('/api/alarm-types')
-        types_success = response.status_code == 200
-        alarm_types_data = None
-        if types_success:
-            data = json.loads(response.data)
-            types_success = data.get('success', False)
-            alarm_types_data = data.get('alarm_types', [])
+        status_code, data = responses['types']
+        types_success = status_code == 200 and data.get('success', False)
+        alarm_types_data = data.get('alarm_types', []) if types_success else []
         print(f"  Alarm Types API test: {'PASS' if types_success else 'FAIL'}")
         
         # Test that we have the expected alarm types
@@ -119,21 +132,18 @@ def test_multiselect_filter():
             for alarm in all_alarms_direct[:3]:
                 print(f"    DEBUG: DB Alarm ID {alarm.get('id')}: type={alarm.get('alarm_type')}, gps_time={alarm.get('gps_time')}")
         
-        # First test without date filtering to see if data exists via API
-        response = client.get('/api/alarms?hours=8760&limit=100')  # 1 year
-        all_data_response = response.status_code == 200
-        if all_data_response:
-            data = json.loads(response.data)
+        # Unfiltered query shows whether data exists via the API at all
+        status_code, data = responses['all']
+        if status_code == 200:
             print(f"    DEBUG: All alarms API response: count={len(data.get('data', []))}")
             if data.get('data'):
                 for alarm in data['data'][:3]:  # Show first 3 alarms
                     print(f"    DEBUG: API Alarm ID {alarm.get('id')}: type={alarm.get('alarm_type')}, time={alarm.get('gps_time')}")
         
         # Test filtering by single alarm type
-        response = client.get('/api/alarms?hours=8760&alarm_types=13')  # Use 1 year to ensure we get data
-        single_filter_success = response.status_code == 200
+        status_code, data = responses['single']
+        single_filter_success = status_code == 200
         if single_filter_success:
-            data = json.loads(response.data)
             print(f"    DEBUG: Single filter response: success={data.get('success')}, count={len(data.get('data', []))}")
             if data.get('data'):
                 print(f"    DEBUG: First alarm type: {data['data'][0].get('alarm_type')}")
@@ -141,14 +151,13 @@ def test_multiselect_filter():
                                    len(data.get('data', [])) >= 1 and
                                    all(alarm['alarm_type'] == 13 for alarm in data['data']))
         else:
-            print(f"    DEBUG: Single filter HTTP error: {response.status_code}")
+            print(f"    DEBUG: Single filter HTTP error: {status_code}")
         print(f"  Single alarm type filter test: {'PASS' if single_filter_success else 'FAIL'}")
         
         # Test filtering by multiple alarm types
-        response = client.get('/api/alarms?hours=24&alarm_types=13,17,24')
-        multi_filter_success = response.status_code == 200
+        status_code, data = responses['multi']
+        multi_filter_success = status_code == 200
         if multi_filter_success:
-            data = json.loads(response.data)
             multi_filter_success = (data.get('success', False) and 
                                   len(data.get('data', [])) == 3)
             if multi_filter_success:
@@ -156,6 +165,23 @@ def test_multiselect_filter():
                 multi_filter_success = all(t in [13, 17, 24] for t in returned_types)
         print(f"  Multiple alarm types filter test: {'PASS' if multi_filter_success else 'FAIL'}")
         
+        # The type-filtered date-range query must run off the alarm indexes
+        # rather than a full table scan; EXPLAIN QUERY PLAN makes any
+        # planner regression visible here instead of in production
+        with db_manager._get_connection() as conn:
+            plan = conn.execute(
+                """EXPLAIN QUERY PLAN
+                   SELECT * FROM alarms
+                   WHERE gps_time >= ? AND gps_time <= ? AND alarm_type IN (13, 17, 24)
+                   ORDER BY gps_time DESC LIMIT 100""",
+                (ts_1h, ts_5m)
+            ).fetchall()
+        plan_text = ' '.join(row['detail'] for row in plan)
+        plan_success = 'USING INDEX idx_alarms' in plan_text
+        if not plan_success:
+            print(f"    DEBUG: Query plan: {plan_text}")
+        print(f"  Date-range query plan test: {'PASS' if plan_success else 'FAIL'}")
+
         # Test alarm type names mapping
         test_type_names = {
             13: "Panic Button",
@@ -174,24 +200,18 @@ def test_multiselect_filter():
                     break
         print(f"  Alarm type names mapping test: {'PASS' if names_success else 'FAIL'}")
         
-        # Restore original database path
-        DATABASE_CONFIG.db_path = original_path
-        
         return all([
             types_success,
             types_match,
             single_filter_success,
             multi_filter_success,
+            plan_success,
             names_success
         ])
         
     except Exception as e:
         print(f"  Multi-select filter test failed: {e}")
         return False
-    finally:
-        # Cleanup
-        if os.path.exists(temp_db.name):
-            os.unlink(temp_db.name)
 
 def main():
     """Run multi-select filter tests"""
@@ -1,14 +1,19 @@
 """
 Test script for Brigade Electronics Device Sync Service
 """
+import os
 import sys
+import json
 import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch, MagicMock
 from logging_config import setup_logging
 from api_client import BrigadeAPIClient
 from database import DatabaseManager
 from device_sync_service import DeviceSyncService
 from alarm_sync_service import AlarmSyncService
+from test_fixtures import make_private_test_db
 
 def test_api_client():
     """Test API client functionality"""
@@ -36,41 +41,51 @@ def test_api_client():
         ]
     }
     
-    with patch('requests.Session.get') as mock_get:
-        mock_get.side_effect = [
-            MagicMock(json=lambda: mock_auth_response, raise_for_status=lambda: None),
-            MagicMock(json=lambda: mock_devices_response, raise_for_status=lambda: None)
-        ]
-        
-        client = BrigadeAPIClient()
-        
-        # Test authentication
-        auth_success = client.authenticate()
-        print(f"  Authentication test: {'PASS' if auth_success else 'FAIL'}")
-        
-        # Test device fetching
-        devices = client.get_devices()
-        print(f"  Device fetch test: {'PASS' if devices and len(devices) == 1 else 'FAIL'}")
-        
-    return auth_success and devices
+    # Point the auth cache at a throwaway file: the client persists the key
+    # from the mocked authentication, and this test runs against the real
+    # config, so the production cache path would get a bogus key otherwise
+    cache_fd, auth_cache_path = tempfile.mkstemp(suffix='.json')
+    os.close(cache_fd)
+
+    try:
+        # Mock the Session class itself so the test can also assert the client
+        # builds exactly one session and reuses it across requests
+        with patch('api_client._auth_cache_path_for', return_value=auth_cache_path), \
+             patch('api_client.requests.Session') as mock_session_cls:
+            mock_session_cls.return_value.get.side_effect = [
+                MagicMock(content=json.dumps(mock_auth_response).encode(), raise_for_status=lambda: None),
+                MagicMock(content=json.dumps(mock_devices_response).encode(), raise_for_status=lambda: None)
+            ]
+
+            client = BrigadeAPIClient()
+            session = client.session
+
+            # Test authentication
+            auth_success = client.authenticate()
+            print(f"  Authentication test: {'PASS' if auth_success else 'FAIL'}")
+
+            # Test device fetching
+            devices = client.get_devices()
+            print(f"  Device fetch test: {'PASS' if devices and len(devices) == 1 else 'FAIL'}")
+
+            # The client must memoize its session rather than re-creating one
+            # per request (connection-pool reuse); the session built in __init__
+            # is still the one in use after both calls
+            session_reuse_success = client.session is session
+            print(f"  Session reuse test: {'PASS' if session_reuse_success else 'FAIL'}")
+    finally:
+        if os.path.exists(auth_cache_path):
+            os.unlink(auth_cache_path)
+
+    return bool(auth_success and devices and session_reuse_success)
 
 def test_database():
     """Test database operations"""
     print("Testing Database Manager...")
     
     try:
-        # Use in-memory database for testing
-        import tempfile
-        import os
-        temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
-        temp_db.close()
-        
-        # Patch the database path
-        from config import DATABASE_CONFIG
-        original_path = DATABASE_CONFIG.db_path
-        DATABASE_CONFIG.db_path = temp_db.name
-        
-        db_manager = DatabaseManager()
+        # Private test database so this test can run alongside the others
+        _, db_manager = make_private_test_db()
         
         # Test device insertion
         test_device = {
@@ -96,12 +111,15 @@ def test_database():
         count = db_manager.get_device_count()
         count_success = count == 1
         print(f"  Device count test: {'PASS' if count_success else 'FAIL'}")
-        
-        # Cleanup
-        DATABASE_CONFIG.db_path = original_path
-        os.unlink(temp_db.name)
-        
-        return insert_success and retrieve_success and count_success
+
+        # Test combined stats: must agree with the individual counter and
+        # see the write above (write-path cache invalidation)
+        stats = db_manager.get_stats()
+        stats_success = (stats['device_count'] == 1
+                         and stats['last_device_update'] is not None)
+        print(f"  Combined stats test: {'PASS' if stats_success else 'FAIL'}")
+
+        return insert_success and retrieve_success and count_success and stats_success
         
     except Exception as e:
         print(f"  Database test failed: {e}")
@@ -124,20 +142,23 @@ def test_sync_service():
         }
     ]
     
-    with patch.object(BrigadeAPIClient, 'get_devices', return_value=mock_devices):
-        with patch.object(DatabaseManager, 'upsert_devices_batch', 
-                         return_value={'inserted': 1, 'updated': 0, 'failed': 0}):
-            
-            sync_service = DeviceSyncService()
-            sync_success = sync_service.sync_devices()
-            print(f"  Sync operation test: {'PASS' if sync_success else 'FAIL'}")
-            
-            # Test status
-            status = sync_service.get_sync_status()
-            status_success = 'last_sync_time' in status
-            print(f"  Status check test: {'PASS' if status_success else 'FAIL'}")
-            
-            return sync_success and status_success
+    # Inject mocks instead of patching the classes: class-level patches leak
+    # into the other tests running concurrently
+    mock_api = MagicMock()
+    mock_api.get_devices.return_value = mock_devices
+    mock_db = MagicMock()
+    mock_db.upsert_devices_batch.return_value = {'inserted': 1, 'updated': 0, 'failed': 0}
+
+    sync_service = DeviceSyncService(api_client=mock_api, db_manager=mock_db)
+    sync_success = sync_service.sync_devices()
+    print(f"  Sync operation test: {'PASS' if sync_success else 'FAIL'}")
+
+    # Test status
+    status = sync_service.get_sync_status()
+    status_success = 'last_sync_time' in status
+    print(f"  Status check test: {'PASS' if status_success else 'FAIL'}")
+
+    return sync_success and status_success
 
 def test_alarm_sync_service():
     """Test alarm sync service"""
@@ -161,39 +182,35 @@ def test_alarm_sync_service():
         }
     ]
     
-    with patch.object(BrigadeAPIClient, 'get_alarm_details', return_value=mock_alarms):
-        with patch.object(DatabaseManager, 'get_all_device_terids', return_value=['TEST001']):
-            with patch.object(DatabaseManager, 'insert_alarms_batch', 
-                             return_value={'inserted': 1, 'failed': 0}):
-                
-                alarm_service = AlarmSyncService()
-                sync_success = alarm_service.sync_alarms()
-                print(f"  Alarm sync operation test: {'PASS' if sync_success else 'FAIL'}")
-                
-                # Test status
-                status = alarm_service.get_sync_status()
-                status_success = 'last_sync_time' in status
-                print(f"  Alarm status check test: {'PASS' if status_success else 'FAIL'}")
-                
-                return sync_success and status_success
+    # Inject mocks instead of patching the classes: class-level patches leak
+    # into the other tests running concurrently
+    mock_api = MagicMock()
+    mock_api.get_alarm_details.return_value = mock_alarms
+    mock_db = MagicMock()
+    mock_db.get_all_device_terids.return_value = ['TEST001']
+    mock_db.insert_alarms_batch.return_value = {'inserted': 1, 'failed': 0}
+    # The first sync also triggers the periodic cleanup, which compares the
+    # returned count against 0 — give it a real int, not a MagicMock
+    mock_db.cleanup_old_alarms.return_value = 0
+
+    alarm_service = AlarmSyncService(api_client=mock_api, db_manager=mock_db)
+    sync_success = alarm_service.sync_alarms()
+    print(f"  Alarm sync operation test: {'PASS' if sync_success else 'FAIL'}")
+
+    # Test status
+    status = alarm_service.get_sync_status()
+    status_success = 'last_sync_time' in status
+    print(f"  Alarm status check test: {'PASS' if status_success else 'FAIL'}")
+
+    return sync_success and status_success
 
 def test_alarm_database():
     """Test alarm database operations"""
     print("Testing Alarm Database Operations...")
     
     try:
-        # Use in-memory database for testing
-        import tempfile
-        import os
-        temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
-        temp_db.close()
-        
-        # Patch the database path
-        from config import DATABASE_CONFIG
-        original_path = DATABASE_CONFIG.db_path
-        DATABASE_CONFIG.db_path = temp_db.name
-        
-        db_manager = DatabaseManager()
+        # Private test database so this test can run alongside the others
+        _, db_manager = make_private_test_db()
         
         # Test alarm insertion
         test_alarm = {
@@ -224,12 +241,15 @@ def test_alarm_database():
         count = db_manager.get_alarm_count()
         count_success = count == 1
         print(f"  Alarm count test: {'PASS' if count_success else 'FAIL'}")
-        
-        # Cleanup
-        DATABASE_CONFIG.db_path = original_path
-        os.unlink(temp_db.name)
-        
-        return insert_success and retrieve_success and count_success
+
+        # Test combined stats: must agree with the individual counter and
+        # see the write above (write-path cache invalidation)
+        stats = db_manager.get_stats()
+        stats_success = (stats['alarm_count'] == 1
+                         and stats['last_alarm_update'] is not None)
+        print(f"  Combined alarm stats test: {'PASS' if stats_success else 'FAIL'}")
+
+        return insert_success and retrieve_success and count_success and stats_success
         
     except Exception as e:
         print(f"  Alarm database test failed: {e}")
@@ -249,15 +269,18 @@ def main():
         test_alarm_sync_service
     ]
     
-    results = []
-    for test in tests:
+    def _safe_run(test):
         try:
-            result = test()
-            results.append(result)
+            return bool(test())
         except Exception as e:
             print(f"  Test failed with exception: {e}")
-            results.append(False)
-        print()
+            return False
+
+    # The tests are independent (mocks plus private databases), so run them
+    # concurrently; output may interleave but results stay ordered
+    with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+        results = list(executor.map(_safe_run, tests))
+    print()
     
     # Summary
     passed = sum(results)
@@ -6,6 +6,9 @@ Tests all components of the Brigade Monitoring System
 import time
 import requests
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from logging_config import setup_logging
 import logging
 
@@ -96,26 +99,50 @@ def test_web_server():
     server_thread = threading.Thread(target=start_server, daemon=True)
     server_thread.start()
     
-    # Wait for server to start
-    time.sleep(3)
-    
+    # One session with keep-alive for every probe below, same setup as
+    # debug_gps.py: each bare requests.get() would open (and tear down) a
+    # fresh TCP connection per endpoint
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=8,
+        max_retries=Retry(total=2, backoff_factor=0.1)
+    ))
+
+    base_url = "http://127.0.0.1:5001"
+
+    # Poll until the server answers instead of sleeping a flat 3 seconds:
+    # usually ready in well under half a second, and the deadline still
+    # covers a loaded machine
+    ready = False
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            if session.get(f"{base_url}/", timeout=0.5).status_code == 200:
+                ready = True
+                break
+        except requests.RequestException:
+            time.sleep(0.05)
+    if not ready:
+        print("❌ Web server did not become ready within 10s")
+        session.close()
+        return False
+
     try:
-        base_url = "http://127.0.0.1:5001"
-        
         # Test main page
-        response = requests.get(f"{base_url}/", timeout=5)
+        response = session.get(f"{base_url}/", timeout=5)
         if response.status_code == 200:
             print("✅ Main heatmap page accessible")
         else:
             print(f"⚠️  Main page returned status {response.status_code}")
-        
+
         # Test GPS tracking page
-        response = requests.get(f"{base_url}/gps-tracking", timeout=5)
+        response = session.get(f"{base_url}/gps-tracking", timeout=5)
         if response.status_code == 200:
             print("✅ GPS tracking page accessible")
         else:
             print(f"⚠️  GPS tracking page returned status {response.status_code}")
-        
+
         # Test API endpoints
         endpoints = [
             "/api/devices",
@@ -123,26 +150,38 @@ def test_web_server():
             "/api/alarm-types",
             "/api/stats"
         ]
-        
-        for endpoint in endpoints:
+
+        # The probes are independent I/O waits, so fire them concurrently
+        # (the server is threaded) and report in a second pass; executor.map
+        # keeps the results in endpoint order so the output stays stable
+        def probe(endpoint):
             try:
-                response = requests.get(f"{base_url}{endpoint}", timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data.get('success', True):
-                        print(f"✅ API endpoint {endpoint} working")
-                    else:
-                        print(f"⚠️  API endpoint {endpoint} returned error: {data.get('error', 'Unknown')}")
-                else:
-                    print(f"⚠️  API endpoint {endpoint} returned status {response.status_code}")
+                return endpoint, session.get(f"{base_url}{endpoint}", timeout=5), None
             except Exception as e:
-                print(f"❌ API endpoint {endpoint} error: {e}")
-        
+                return endpoint, None, e
+
+        with ThreadPoolExecutor(max_workers=len(endpoints)) as executor:
+            results = list(executor.map(probe, endpoints))
+
+        for endpoint, response, error in results:
+            if error is not None:
+                print(f"❌ API endpoint {endpoint} error: {error}")
+            elif response.status_code == 200:
+                data = response.json()
+                if data.get('success', True):
+                    print(f"✅ API endpoint {endpoint} working")
+                else:
+                    print(f"⚠️  API endpoint {endpoint} returned error: {data.get('error', 'Unknown')}")
+            else:
+                print(f"⚠️  API endpoint {endpoint} returned status {response.status_code}")
+
         return True
-        
+
     except Exception as e:
         print(f"❌ Web server test error: {e}")
         return False
+    finally:
+        session.close()
 
 def main():
     """Run all tests"""
@@ -160,14 +199,21 @@ def main():
     
     passed = 0
     total = len(tests)
-    
-    for test_name, test_func in tests:
-        print(f"\n📋 Running {test_name} test...")
-        try:
-            if test_func():
-                passed += 1
-        except Exception as e:
-            print(f"❌ Test {test_name} failed with exception: {e}")
+
+    # The tests are independent (the web server test runs on its own port
+    # and the others only read), so run them concurrently and let the wall
+    # time be the slowest test instead of the sum. Output lines from
+    # different tests may interleave; the summary below stays authoritative
+    print(f"\n📋 Running {total} tests concurrently: "
+          + ", ".join(name for name, _ in tests))
+    with ThreadPoolExecutor(max_workers=total) as executor:
+        futures = [(name, executor.submit(func)) for name, func in tests]
+        for test_name, future in futures:
+            try:
+                if future.result():
+                    passed += 1
+            except Exception as e:
+                print(f"❌ Test {test_name} failed with exception: {e}")
     
     print("\n" + "=" * 60)
     print(f"🏁 Test Results: {passed}/{total} tests passed")
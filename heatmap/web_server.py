@@ -1,32 +1,182 @@
 """
 Web server for Brigade Electronics Alarm Heatmap
 """
+import gzip
+import hashlib
 import json
 import logging
+import threading
+import time
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
-from flask import Flask, render_template, jsonify, request, send_from_directory
+import orjson
+from flask import Flask, Response, render_template, jsonify, request, send_from_directory
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 from database import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
+
+class _ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, like the API client's codec.
+
+    /api/alarms regularly returns thousands of small dicts; encoding them
+    in C instead of stdlib json takes most of the serialization cost off
+    each response. OPT_NON_STR_KEYS keeps the stdlib behaviour of turning
+    the int keys in alarm_type_counts into strings.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand the orjson bytes straight to the response instead of going
+        # through dumps() and paying an extra decode/encode round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS),
+            mimetype='application/json'
+        )
+
+# Response cache tuning. The heatmap UI auto-refreshes and is often open in
+# several browsers at once, so identical queries arrive within seconds of
+# each other; a short TTL turns those repeats into dict lookups while the
+# sync services only land new data every few minutes anyway
+_CACHE_TTL_SECONDS = 30.0
+_CACHE_MAX_ENTRIES = 256
+# Device and alarm-type reference data only moves when the device sync
+# runs (every few minutes), so the filter dropdowns can ride a much longer
+# TTL than the alarm data itself
+_REFERENCE_TTL_SECONDS = 300.0
+# Only bodies at least this large are worth gzipping: below it the saved
+# bytes don't cover the compression header and CPU
+_COMPRESS_MIN_SIZE = 1024
+
+# Alarm type -> heatmap intensity (0.1 to 1.0). Built once at import:
+# _get_alarm_intensity runs per alarm row, and rebuilding the dict literal
+# per call made every lookup pay the map's construction cost
+_ALARM_INTENSITY_MAP = {
+    1: 0.3,   # Video Loss
+    2: 0.2,   # Motion Detection
+    3: 0.2,   # Blind Detection
+    4: 0.4,   # HDD/SD Error
+    5: 0.5,   # IO 1
+    6: 0.5,   # IO 2
+    13: 1.0,  # Panic Button
+    14: 0.6,  # Low Speed
+    15: 0.8,  # High Speed
+    16: 0.7,  # Low Voltage
+    17: 0.9,  # G-Force
+    18: 0.6,  # Geo-Fence
+    19: 0.8,  # Unauthorised Ignition
+    29: 0.7,  # Temperature Alarm
+    36: 0.9,  # Impact Alarm
+    58: 0.8,  # Driver Fatigue
+    59: 0.9,  # No Driver
+    60: 0.4,  # Phone Detection
+    61: 0.4,  # Smoking Detection
+    62: 0.6,  # Driver Distraction
+    63: 0.7,  # Lane Departure
+    64: 0.8,  # Forward Collision Warning
+}
+
 class AlarmHeatmapServer:
     """Web server for alarm heatmap visualization"""
     
-    def __init__(self, host='127.0.0.1', port=5000, debug=False):
+    def __init__(self, host='127.0.0.1', port=5000, debug=False, db_manager: Optional[DatabaseManager] = None):
         self.app = Flask(__name__, 
                         template_folder='templates',
                         static_folder='static')
         CORS(self.app)
-        
+        self.app.json = _ORJSONProvider(self.app)
+
         self.host = host
         self.port = port
         self.debug = debug
-        self.db_manager = DatabaseManager()
-        
+        # Accept a shared manager so callers (and tests) can point the server
+        # at a specific database without touching global config
+        self.db_manager = db_manager or DatabaseManager()
+
+        # Read-endpoint response cache: query key -> (fetched_at, payload),
+        # same shape as the stats cache in DatabaseManager
+        self._response_cache = {}
+        self._response_cache_lock = threading.Lock()
+
         # Setup routes
         self._setup_routes()
+
+    def _cached_payload(self, key):
+        """Return the cached payload for key, or None if absent/expired"""
+        with self._response_cache_lock:
+            entry = self._response_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if time.monotonic() >= expires_at:
+            return None
+        return payload
+
+    def _store_payload(self, key, payload, ttl):
+        """Cache payload under key, pruning expired entries when full"""
+        now = time.monotonic()
+        with self._response_cache_lock:
+            if len(self._response_cache) >= _CACHE_MAX_ENTRIES:
+                self._response_cache = {
+                    k: v for k, v in self._response_cache.items()
+                    if v[0] > now
+                }
+                # Still full means 256 distinct live queries in one TTL
+                # window; start over rather than track per-entry recency
+                if len(self._response_cache) >= _CACHE_MAX_ENTRIES:
+                    self._response_cache.clear()
+            self._response_cache[key] = (now + ttl, payload)
+
+    def _cache_response(self, key, build, ttl=_CACHE_TTL_SECONDS):
+        """Serve key from the response cache, calling build() on a miss.
+
+        The cache holds the encoded body, its gzipped form and its ETag,
+        so a hit costs a dict lookup — no re-serialization, no
+        recompression — and a client polling with If-None-Match gets a
+        bodyless 304. X-Cache: HIT/MISS makes cache behaviour observable
+        from curl during tuning.
+        """
+        entry = self._cached_payload(key)
+        if entry is None:
+            body = jsonify(build()).get_data()
+            etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+            # Large alarm payloads are long runs of repeated JSON keys and
+            # compress 5-10x; gzip once, with mtime=0 so the bytes (and
+            # thus any downstream hashing) stay deterministic
+            gz_body = None
+            if len(body) >= _COMPRESS_MIN_SIZE:
+                gz_body = gzip.compress(body, compresslevel=6, mtime=0)
+                if len(gz_body) >= len(body):
+                    gz_body = None
+            self._store_payload(key, (body, gz_body, etag), ttl)
+            cache_state = 'MISS'
+        else:
+            body, gz_body, etag = entry
+            cache_state = 'HIT'
+
+        if gz_body is not None and request.accept_encodings.quality('gzip'):
+            response = Response(gz_body, mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = Response(body, mimetype='application/json')
+        response.headers['X-Cache'] = cache_state
+        response.vary.add('Accept-Encoding')
+
+        # Browsers may reuse the payload for ttl seconds without asking;
+        # after that, If-None-Match revalidation short-circuits to a 304
+        # unless the body actually changed
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = f'max-age={int(ttl)}'
+        return response.make_conditional(request)
     
     def _setup_routes(self):
         """Setup Flask routes"""
@@ -47,34 +197,59 @@ class AlarmHeatmapServer:
                 end_date = request.args.get('end_date')
                 alarm_types = request.args.get('alarm_types')
                 device_id = request.args.get('device_id')
-                
-                # Build alarm data query
-                alarms = self._get_alarm_data(
-                    hours=hours,
-                    limit=limit,
-                    start_date=start_date,
-                    end_date=end_date,
-                    alarm_types=alarm_types,
-                    device_id=device_id
-                )
-                
-                # Convert to heatmap format
-                heatmap_data = self._convert_to_heatmap_format(alarms)
-                
-                return jsonify({
-                    'success': True,
-                    'data': heatmap_data,
-                    'count': len(alarms),
-                    'query_params': {
-                        'hours': hours,
-                        'limit': limit,
-                        'start_date': start_date,
-                        'end_date': end_date,
-                        'alarm_types': alarm_types,
-                        'device_id': device_id
+
+                # Streaming mode: one JSON object per line so the client can
+                # start plotting before the last point is even produced, and
+                # the server never holds the full point list. Bypasses the
+                # response cache — there is no single payload to keep
+                if request.args.get('format') == 'ndjson':
+                    alarms = self._get_alarm_data(
+                        hours=hours,
+                        limit=limit,
+                        start_date=start_date,
+                        end_date=end_date,
+                        alarm_types=alarm_types,
+                        device_id=device_id
+                    )
+
+                    def generate():
+                        for point in self._iter_heatmap_points(alarms):
+                            yield orjson.dumps(point) + b'\n'
+
+                    return Response(generate(), mimetype='application/x-ndjson')
+
+                # Cache per canonical query so every auto-refreshing viewer
+                # of the same view shares one DB round-trip per TTL window
+                key = ('alarms', hours, limit, start_date, end_date,
+                       alarm_types, device_id)
+
+                def build():
+                    alarms = self._get_alarm_data(
+                        hours=hours,
+                        limit=limit,
+                        start_date=start_date,
+                        end_date=end_date,
+                        alarm_types=alarm_types,
+                        device_id=device_id
+                    )
+                    heatmap_data = self._convert_to_heatmap_format(alarms)
+                    return {
+                        'success': True,
+                        'data': heatmap_data,
+                        'count': len(alarms),
+                        'query_params': {
+                            'hours': hours,
+                            'limit': limit,
+                            'start_date': start_date,
+                            'end_date': end_date,
+                            'alarm_types': alarm_types,
+                            'device_id': device_id
+                        }
                     }
-                })
-                
+
+                return self._cache_response(key, build)
+
+
             except Exception as e:
                 logger.error(f"Error fetching alarm data: {e}")
                 return jsonify({
@@ -109,25 +284,75 @@ class AlarmHeatmapServer:
                     'error': str(e)
                 }), 500
         
+        @self.app.route('/api/alarm-details')
+        def get_alarm_details_batch():
+            """Get details for several alarms in one request
+
+            Batch companion to /api/alarm/<id>: clicking around the
+            heatmap fires popup lookups in bursts, and one ?ids=1,2,3
+            round-trip with a single IN query beats N requests each
+            running its own SELECT.
+            """
+            try:
+                ids_param = request.args.get('ids', '')
+                try:
+                    alarm_ids = [int(t) for t in ids_param.split(',') if t.strip()]
+                except ValueError:
+                    return jsonify({
+                        'success': False,
+                        'error': 'ids must be a comma-separated list of integers'
+                    }), 400
+                if not alarm_ids or len(alarm_ids) > 64:
+                    return jsonify({
+                        'success': False,
+                        'error': 'ids must contain between 1 and 64 alarm ids'
+                    }), 400
+
+                alarms = self.db_manager.get_alarms_by_ids(alarm_ids)
+
+                # One device lookup per distinct terid, shared by all of
+                # that device's alarms
+                devices = {}
+                for alarm in alarms:
+                    terid = alarm['terid']
+                    if terid not in devices:
+                        devices[terid] = self.db_manager.get_device_by_terid(terid)
+
+                return jsonify({
+                    'success': True,
+                    'alarms': alarms,
+                    'devices': devices
+                })
+
+            except Exception as e:
+                logger.error(f"Error fetching alarm details batch: {e}")
+                return jsonify({
+                    'success': False,
+                    'error': str(e)
+                }), 500
+
         @self.app.route('/api/devices')
         def get_devices():
             """Get list of all devices for filtering"""
             try:
-                devices = self.db_manager.get_all_devices()
-                device_list = [
-                    {
-                        'terid': device['terid'],
-                        'car_license': device['car_license'],
-                        'company_name': device.get('company_name', '')
+                def build():
+                    devices = self.db_manager.get_all_devices()
+                    return {
+                        'success': True,
+                        'devices': [
+                            {
+                                'terid': device['terid'],
+                                'car_license': device['car_license'],
+                                'company_name': device.get('company_name', '')
+                            }
+                            for device in devices
+                        ]
                     }
-                    for device in devices
-                ]
-                
-                return jsonify({
-                    'success': True,
-                    'devices': device_list
-                })
-                
+
+                return self._cache_response(('devices',), build,
+                                            ttl=_REFERENCE_TTL_SECONDS)
+
+
             except Exception as e:
                 logger.error(f"Error fetching devices: {e}")
                 return jsonify({
@@ -139,12 +364,16 @@ class AlarmHeatmapServer:
         def get_alarm_types():
             """Get distinct alarm types for filtering"""
             try:
-                alarm_types = self.db_manager.get_distinct_alarm_types()
-                return jsonify({
-                    'success': True,
-                    'alarm_types': alarm_types
-                })
-                
+                def build():
+                    return {
+                        'success': True,
+                        'alarm_types': self.db_manager.get_distinct_alarm_types()
+                    }
+
+                return self._cache_response(('alarm_types',), build,
+                                            ttl=_REFERENCE_TTL_SECONDS)
+
+
             except Exception as e:
                 logger.error(f"Error fetching alarm types: {e}")
                 return jsonify({
@@ -156,12 +385,15 @@ class AlarmHeatmapServer:
         def get_stats():
             """Get alarm statistics"""
             try:
-                stats = self._get_alarm_stats()
-                return jsonify({
-                    'success': True,
-                    'stats': stats
-                })
-                
+                def build():
+                    return {
+                        'success': True,
+                        'stats': self._get_alarm_stats()
+                    }
+
+                return self._cache_response(('stats',), build)
+
+
             except Exception as e:
                 logger.error(f"Error fetching stats: {e}")
                 return jsonify({
@@ -169,6 +401,17 @@ class AlarmHeatmapServer:
                     'error': str(e)
                 }), 500
         
+        @self.app.route('/api/cache/flush', methods=['POST'])
+        def flush_cache():
+            """Drop all cached responses (for use after manual DB edits)"""
+            with self._response_cache_lock:
+                dropped = len(self._response_cache)
+                self._response_cache.clear()
+            return jsonify({
+                'success': True,
+                'dropped': dropped
+            })
+
         @self.app.route('/api/gps/positions')
         def get_gps_positions():
             """Get current GPS positions for all devices"""
@@ -236,6 +479,9 @@ class AlarmHeatmapServer:
                        alarm_types: Optional[str] = None, device_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get alarm data with filtering"""
         
+        # Rows without plottable coordinates are dropped inside SQLite
+        # (require_valid_gps) instead of being materialized here only for
+        # _iter_heatmap_points to throw them away
         if start_date and end_date:
             # Use custom date range
             return self.db_manager.get_alarms_by_date_range(
@@ -243,46 +489,54 @@ class AlarmHeatmapServer:
                 end_date=end_date,
                 limit=limit,
                 alarm_types=[int(t.strip()) for t in alarm_types.split(',')] if alarm_types else None,
-                device_id=device_id
+                device_id=device_id,
+                require_valid_gps=True
             )
         else:
-            # Use hours parameter with filtering
-            from datetime import datetime, timedelta
-            end_time = datetime.now()
+            # Use hours parameter with filtering. Quantized to whole seconds
+            # so rapid repeats of the same window produce identical strings,
+            # and formatted with isoformat (C-implemented) rather than
+            # strftime's format-string parsing
+            end_time = datetime.now().replace(microsecond=0)
             start_time = end_time - timedelta(hours=hours)
-            
+
             return self.db_manager.get_alarms_by_date_range(
-                start_date=start_time.strftime('%Y-%m-%d %H:%M:%S'),
-                end_date=end_time.strftime('%Y-%m-%d %H:%M:%S'),
+                start_date=start_time.isoformat(sep=' '),
+                end_date=end_time.isoformat(sep=' '),
                 limit=limit,
                 alarm_types=[int(t.strip()) for t in alarm_types.split(',')] if alarm_types else None,
-                device_id=device_id
+                device_id=device_id,
+                require_valid_gps=True
             )
-    
-    def _convert_to_heatmap_format(self, alarms: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Convert alarm data to heatmap format"""
-        heatmap_data = []
-        
+
+    def _iter_heatmap_points(self, alarms: List[Dict[str, Any]]):
+        """Yield heatmap points for alarms with usable coordinates.
+
+        Generator so the NDJSON streaming path can emit points as they
+        are produced instead of materializing the whole list first.
+        """
+        # Bind the per-row lookup once instead of a LOAD_ATTR per alarm.
+        # Using the map's .get directly also skips the _get_alarm_intensity
+        # wrapper call per row; the method stays for callers that want the
+        # default handling spelled out
+        intensity_of = _ALARM_INTENSITY_MAP.get
+
         for alarm in alarms:
-            # Skip alarms without valid GPS coordinates
-            if not alarm.get('gps_lat') or not alarm.get('gps_lng'):
-                continue
-            
             try:
-                lat = float(alarm['gps_lat'])
-                lng = float(alarm['gps_lng'])
-                
-                # Skip invalid coordinates
-                if lat == 0 and lng == 0:
-                    continue
-                if not (-90 <= lat <= 90) or not (-180 <= lng <= 180):
+                lat = float(alarm['gps_lat'] or 0.0)
+                lng = float(alarm['gps_lng'] or 0.0)
+
+                # One numeric predicate covers the missing, zero and
+                # out-of-range cases the old separate gates checked with
+                # repeated dict lookups
+                if not (lat and lng and -90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
                     continue
-                
-                heatmap_point = {
+
+                yield {
                     'id': alarm['id'],
                     'lat': lat,
                     'lng': lng,
-                    'intensity': self._get_alarm_intensity(alarm['alarm_type']),
+                    'intensity': intensity_of(alarm['alarm_type'], 0.5),
                     'terid': alarm['terid'],
                     'alarm_type': alarm['alarm_type'],
                     'alarm_content': alarm.get('alarm_content', ''),
@@ -291,67 +545,45 @@ class AlarmHeatmapServer:
                     'altitude': alarm.get('altitude', 0),
                     'direction': alarm.get('direction', 0)
                 }
-                
-                heatmap_data.append(heatmap_point)
-                
-            except (ValueError, TypeError) as e:
-                logger.debug(f"Skipping alarm with invalid coordinates: {e}")
+
+            except (KeyError, ValueError, TypeError) as e:
+                logger.debug("Skipping alarm with invalid coordinates: %s", e)
                 continue
-        
-        return heatmap_data
-    
-    def _get_alarm_intensity(self, alarm_type: int) -> float:
+
+    def _convert_to_heatmap_format(self, alarms: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Convert alarm data to heatmap format"""
+        return list(self._iter_heatmap_points(alarms))
+
+
+    @staticmethod
+    def _get_alarm_intensity(alarm_type: int) -> float:
         """Get intensity value for alarm type (for heatmap visualization)"""
-        # Map alarm types to intensity values (0.1 to 1.0)
-        intensity_map = {
-            1: 0.3,   # Video Loss
-            2: 0.2,   # Motion Detection
-            3: 0.2,   # Blind Detection
-            4: 0.4,   # HDD/SD Error
-            5: 0.5,   # IO 1
-            6: 0.5,   # IO 2
-            13: 1.0,  # Panic Button
-            14: 0.6,  # Low Speed
-            15: 0.8,  # High Speed
-            16: 0.7,  # Low Voltage
-            17: 0.9,  # G-Force
-            18: 0.6,  # Geo-Fence
-            19: 0.8,  # Unauthorised Ignition
-            29: 0.7,  # Temperature Alarm
-            36: 0.9,  # Impact Alarm
-            58: 0.8,  # Driver Fatigue
-            59: 0.9,  # No Driver
-            60: 0.4,  # Phone Detection
-            61: 0.4,  # Smoking Detection
-            62: 0.6,  # Driver Distraction
-            63: 0.7,  # Lane Departure
-            64: 0.8,  # Forward Collision Warning
-        }
-        
-        return intensity_map.get(alarm_type, 0.5)  # Default intensity
-    
+        return _ALARM_INTENSITY_MAP.get(alarm_type, 0.5)  # Default intensity
+
     def _get_alarm_stats(self) -> Dict[str, Any]:
         """Get alarm statistics"""
         try:
-            total_alarms = self.db_manager.get_alarm_count()
-            total_devices = self.db_manager.get_device_count()
+            # One combined (and briefly cached) query for the scalar counts
+            # instead of a connection round trip per counter
+            db_stats = self.db_manager.get_stats()
+            total_alarms = db_stats['alarm_count']
+            total_devices = db_stats['device_count']
             
-            # Get recent alarm counts by type
+            # Count alarms by type and by device in a single pass over the
+            # result set (up to 10000 rows) instead of traversing it twice
             recent_alarms = self.db_manager.get_recent_alarms(hours=24, limit=10000)
-            alarm_type_counts = {}
-            
-            for alarm in recent_alarms:
-                alarm_type = alarm.get('alarm_type', 0)
-                alarm_type_counts[alarm_type] = alarm_type_counts.get(alarm_type, 0) + 1
-            
-            # Get device with most alarms
-            device_alarm_counts = {}
+            alarm_type_counts = Counter()
+            device_alarm_counts = Counter()
             for alarm in recent_alarms:
+                alarm_type_counts[alarm.get('alarm_type', 0)] += 1
                 terid = alarm.get('terid')
                 if terid:
-                    device_alarm_counts[terid] = device_alarm_counts.get(terid, 0) + 1
-            
-            most_active_device = max(device_alarm_counts.items(), key=lambda x: x[1]) if device_alarm_counts else None
+                    device_alarm_counts[terid] += 1
+
+            # most_common runs the selection in C; max() with a lambda paid
+            # a Python callable per device
+            most_common = device_alarm_counts.most_common(1)
+            most_active_device = most_common[0] if most_common else None
             
             return {
                 'total_alarms': total_alarms,
@@ -371,8 +603,12 @@ class AlarmHeatmapServer:
     
     def run(self):
         """Start the web server"""
-        logger.info(f"Starting Alarm Heatmap Server on {self.host}:{self.port}")
-        self.app.run(host=self.host, port=self.port, debug=self.debug)
+        logger.info("Starting Alarm Heatmap Server on %s:%s", self.host, self.port)
+        # threaded=True gives every request its own handler thread, so one
+        # slow DB-bound endpoint no longer serializes every other client;
+        # the read-only connection pool in DatabaseManager is built for
+        # exactly this concurrency
+        self.app.run(host=self.host, port=self.port, debug=self.debug, threaded=True)
 
 def main():
     """Run the web server"""